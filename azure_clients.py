@@ -0,0 +1,82 @@
+import asyncio
+import functools
+import threading
+import streamlit as st
+
+# API version used when secrets.toml does not pin one
+DEFAULT_API_VERSION = "2024-08-01-preview"
+
+# The background event loop and the async client bound to it, created once under _async_lock
+_event_loop = None
+_async_client = None
+_async_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def azure_settings() -> dict:
+    """Azure OpenAI settings from secrets.toml, read on first use instead of at import time."""
+    secrets = st.secrets["azure_openai"]
+    return {
+        "api_key": secrets["api_key"],
+        "endpoint": secrets["endpoint"],
+        "deployment": secrets["deployment"],
+        "api_version": secrets.get("api_version", DEFAULT_API_VERSION),
+    }
+
+
+def azure_deployment() -> str:
+    """Name of the chat deployment every Azure OpenAI call is sent to."""
+    return azure_settings()["deployment"]
+
+
+@functools.lru_cache(maxsize=None)
+def get_azure_client():
+    """Process-wide ``openai.AzureOpenAI`` client, created on first use.
+
+    The openai package is only imported here, so modules that merely import this one stay
+    fast to load and do not need secrets until a model is actually called.
+    """
+    from openai import AzureOpenAI
+
+    settings = azure_settings()
+    return AzureOpenAI(
+        api_key=settings["api_key"],
+        api_version=settings["api_version"],
+        azure_endpoint=settings["endpoint"],
+    )
+
+
+def azure_event_loop() -> asyncio.AbstractEventLoop:
+    """Event loop on a daemon thread that runs every async Azure OpenAI call.
+
+    Streamlit reruns the script on its own threads, so coroutines are submitted here with
+    ``asyncio.run_coroutine_threadsafe`` instead of starting a loop per call. A single loop also
+    lets the async client below keep its connection pool between runs. Created under a lock, so
+    two sessions starting at once never end up with a loop each.
+    """
+    global _event_loop
+    with _async_lock:
+        if _event_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="azure-openai-loop", daemon=True).start()
+            _event_loop = loop
+        return _event_loop
+
+
+def get_async_azure_client():
+    """Process-wide ``openai.AsyncAzureOpenAI`` client. Only await it on ``azure_event_loop()``.
+
+    Created under the same lock as the loop; its connection pool is bound to that one loop.
+    """
+    global _async_client
+    with _async_lock:
+        if _async_client is None:
+            from openai import AsyncAzureOpenAI
+
+            settings = azure_settings()
+            _async_client = AsyncAzureOpenAI(
+                api_key=settings["api_key"],
+                api_version=settings["api_version"],
+                azure_endpoint=settings["endpoint"],
+            )
+        return _async_client
@@ -0,0 +1,234 @@
+"""Offline search benchmark over a synthetic resume corpus.
+
+Generates resumes in the ResumeStandardizer JSON schema and times a fixed query mix through
+the same pipeline the search page runs: compile the query with BooleanSearchParser, evaluate
+it (scan mode: evaluate_expression + calculate_rank over the stored normalized text; index
+mode: the inverted index + BM25F on mongomock), page the ranking and highlight the page.
+Every corpus size runs in its own process so the reported peak RSS belongs to that size.
+mongomock evaluates $in and $regex filters in Python, so index-mode numbers are only
+comparable with other index-mode runs, and sizes beyond ~10k get slow.
+
+    python benchmark_search.py                          # scan mode at 1k / 10k / 100k
+    python benchmark_search.py --mode both --sizes 1000 10000
+"""
+import argparse
+import json
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+from search_index import SearchIndex, BM25Scorer, search_text
+from final_retriever import (
+    RESULTS_PAGE_SIZE,
+    calculate_rank,
+    compile_search_query,
+    evaluate_expression,
+    get_highlighter,
+    highlight_dict_values,
+    normalize_boolean_operators,
+    top_k_results,
+)
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+# (label, query as typed). NL queries use canned conversions so the benchmark never calls Azure.
+QUERY_MIX = [
+    ("and", "Python AND Django"),
+    ("or", "Java OR Kotlin"),
+    ("grouped", "(AWS OR Azure) AND Kubernetes"),
+    ("not", "React AND NOT Angular"),
+    ("quoted", '"machine learning" AND Python'),
+    ("nl", "Show me candidates skilled in Java and Spring Boot"),
+    ("nl", "Find someone who knows Python or data science"),
+]
+NL_CONVERSIONS = {
+    "Show me candidates skilled in Java and Spring Boot": "java and springboot",
+    "Find someone who knows Python or data science": "python or datascience",
+}
+
+FIRST_NAMES = ["Aarav", "Priya", "Rahul", "Sneha", "Vikram", "Ananya", "Arjun", "Meera", "Karan", "Divya"]
+LAST_NAMES = ["Sharma", "Gupta", "Patel", "Reddy", "Iyer", "Singh", "Nair", "Mehta", "Das", "Kapoor"]
+CITIES = ["Bengaluru", "Pune", "Hyderabad", "Gurugram", "Chennai", "Noida", "Mumbai"]
+SKILLS = [
+    "Python", "Java", "Kotlin", "JavaScript", "TypeScript", "React", "Angular", "Node.js", "Django", "Flask",
+    "FastAPI", "Spring Boot", "ASP.NET", "C#", "Go", "SQL", "PostgreSQL", "MongoDB", "Redis", "Kafka",
+    "AWS", "Azure", "GCP", "Docker", "Kubernetes", "Terraform", "Jenkins", "Machine Learning",
+    "Deep Learning", "Data Science", "Pandas", "PyTorch", "TensorFlow", "Spark", "Airflow", "Power BI",
+]
+TITLES = ["Software Engineer", "Senior Developer", "Data Scientist", "DevOps Engineer", "Full Stack Developer",
+          "ML Engineer", "Backend Developer", "Cloud Architect"]
+COMPANIES = ["Infosys", "TCS", "Wipro", "Accenture", "Flipkart", "Zoho", "Freshworks", "Razorpay", "Swiggy"]
+DEGREES = ["B.Tech in Computer Science", "M.Tech in Data Science", "BCA", "MCA", "B.E. in Electronics"]
+INSTITUTIONS = ["IIT Delhi", "NIT Trichy", "BITS Pilani", "VIT Vellore", "Anna University", "IIIT Hyderabad"]
+VERBS = ["Built", "Designed", "Led", "Migrated", "Optimized", "Automated", "Implemented", "Maintained"]
+OBJECTS = ["a microservices platform", "real-time dashboards", "ETL pipelines", "a recommendation engine",
+           "CI/CD workflows", "REST APIs", "a payments gateway", "data quality checks", "an HR chatbot"]
+CERTIFICATIONS = ["AWS Certified Solutions Architect", "Azure Fundamentals AZ-900", "CKA", "PMP",
+                  "Google Professional Data Engineer", "Oracle Certified Java Programmer"]
+
+
+def _sentence(rng: random.Random, skills) -> str:
+    return (f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(skills)} and {rng.choice(skills)}, "
+            f"improving throughput by {rng.randint(10, 80)}% for {rng.randint(2, 40)} teams.")
+
+
+def synthetic_resume(rng: random.Random) -> dict:
+    """One resume in the ResumeStandardizer JSON schema."""
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    skills = rng.sample(SKILLS, rng.randint(5, 12))
+    return {
+        "_id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "name": f"{first} {last}",
+        "email": f"{first.lower()}.{last.lower()}{rng.randint(1, 999)}@example.com",
+        "phone": f"+91 9{rng.randint(100000000, 999999999)}",
+        "location": rng.choice(CITIES),
+        "summary": " ".join(_sentence(rng, skills) for _ in range(rng.randint(2, 4))),
+        "education": [
+            {"degree": rng.choice(DEGREES), "institution": rng.choice(INSTITUTIONS), "year": rng.randint(2005, 2023)}
+            for _ in range(rng.randint(1, 2))
+        ],
+        "experience": [
+            {
+                "title": rng.choice(TITLES),
+                "company": rng.choice(COMPANIES),
+                "duration": f"{rng.randint(1, 6)} years",
+                "location": rng.choice(CITIES),
+                "description": " ".join(_sentence(rng, skills) for _ in range(rng.randint(2, 5))),
+            }
+            for _ in range(rng.randint(1, 4))
+        ],
+        "skills": skills,
+        "projects": [
+            {"title": f"{rng.choice(OBJECTS).split(' ', 1)[-1].title()}",
+             "description": " ".join(_sentence(rng, skills) for _ in range(rng.randint(1, 3)))}
+            for _ in range(rng.randint(1, 4))
+        ],
+        "certifications": [{"title": title} for title in rng.sample(CERTIFICATIONS, rng.randint(0, 2))],
+        "languages": rng.sample(["English", "Hindi", "Tamil", "Telugu", "Kannada"], 2),
+        "social_profiles": [{"platform": "GitHub", "link": f"https://github.com/{first.lower()}{last.lower()}"}],
+    }
+
+
+def generate_corpus(size: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    return [synthetic_resume(rng) for _ in range(size)]
+
+
+def _to_boolean(query: str) -> str:
+    return normalize_boolean_operators(NL_CONVERSIONS.get(query, query))
+
+
+def _highlight_page(page_results, docs_by_id, plan):
+    highlighter = get_highlighter(frozenset(plan.search_terms))
+    for resume_id, _ in page_results:
+        highlight_dict_values(docs_by_id[resume_id], highlighter)
+
+
+def run_scan_query(query: str, texts, docs_by_id) -> int:
+    """Scan path: evaluate and rank every stored text, then page and highlight."""
+    plan = compile_search_query(_to_boolean(query))
+    doc_ranks = {}
+    for resume_id, norm_text in texts:
+        if evaluate_expression(plan, norm_text):
+            doc_ranks[resume_id] = calculate_rank({"_id": resume_id}, plan.search_terms, norm_text)
+    _highlight_page(top_k_results(doc_ranks, RESULTS_PAGE_SIZE), docs_by_id, plan)
+    return len(doc_ranks)
+
+
+def run_index_query(query: str, index: SearchIndex, docs_by_id) -> int:
+    """Index path: resolve postings, score with BM25F, then page and highlight."""
+    plan = compile_search_query(_to_boolean(query))
+    bits = plan.match_bits(index)
+    scorer = BM25Scorer(index.stats(), plan.document_frequencies(index))
+    doc_ranks = {record["_id"]: scorer.score(record) for record in index.iter_records(bits, scorer.projection(index))}
+    _highlight_page(top_k_results(doc_ranks, RESULTS_PAGE_SIZE), docs_by_id, plan)
+    return len(doc_ranks)
+
+
+def _percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def benchmark_size(size: int, mode: str, repeat: int) -> dict:
+    """Benchmark one corpus size in this process and return its latency and memory figures."""
+    corpus = generate_corpus(size)
+    docs_by_id = {doc["_id"]: doc for doc in corpus}
+    result = {"size": size, "mode": mode}
+
+    if mode == "scan":
+        texts = [(doc["_id"], search_text(doc)) for doc in corpus]
+        run = lambda query: run_scan_query(query, texts, docs_by_id)
+    else:
+        import mongomock
+
+        db = mongomock.MongoClient()["benchmark"]
+        db["resumes"].insert_many(corpus)
+        index = SearchIndex(db, "resumes")
+        for doc in corpus:
+            index.store_document(doc)
+        start = time.perf_counter()
+        index.build()
+        result["build_s"] = round(time.perf_counter() - start, 2)
+        run = lambda query: run_index_query(query, index, docs_by_id)
+
+    samples, matches = [], {}
+    for _ in range(repeat):
+        for _, query in QUERY_MIX:
+            start = time.perf_counter()
+            matches[query] = run(query)
+            samples.append((time.perf_counter() - start) * 1000)
+    result.update({
+        "p50_ms": round(statistics.median(samples), 2),
+        "p95_ms": round(_percentile(samples, 95), 2),
+        "queries": len(samples),
+        "avg_matches": round(sum(matches.values()) / len(matches)),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark resume search on a synthetic corpus.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Corpus sizes to benchmark")
+    parser.add_argument("--mode", choices=["scan", "index", "both"], default="scan",
+                        help="scan = stored-text scan, index = inverted index + BM25F on mongomock")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs of the full query mix per size")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    modes = ["scan", "index"] if args.mode == "both" else [args.mode]
+    if args.worker:
+        print(json.dumps(benchmark_size(args.sizes[0], modes[0], args.repeat)))
+        return
+
+    print(f"{'mode':<6} {'docs':>8} {'p50 ms':>10} {'p95 ms':>10} {'peak RSS MB':>12} {'matches':>8}  build")
+    for mode in modes:
+        for size in args.sizes:
+            # A fresh process per size keeps each peak RSS figure independent
+            proc = subprocess.run(
+                [sys.executable, __file__, "--worker", "--sizes", str(size), "--mode", mode,
+                 "--repeat", str(args.repeat)],
+                capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                print(f"❌ {mode} @ {size} failed:\n{proc.stderr.strip()}")
+                continue
+            row = json.loads(proc.stdout.strip().splitlines()[-1])
+            build = f"{row['build_s']}s" if "build_s" in row else "-"
+            print(f"{mode:<6} {size:>8} {row['p50_ms']:>10} {row['p95_ms']:>10} {row['peak_rss_mb']:>12} "
+                  f"{row['avg_matches']:>8}  {build}")
+
+
+if __name__ == "__main__":
+    main()
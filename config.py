@@ -1,6 +1,18 @@
 import os
 import streamlit as st
 
-MONGO_URI = st.secrets["mongo"]["uri"]
-DB_NAME = st.secrets["mongo"]["db_name"]
-COLLECTION_NAME = st.secrets["mongo"]["collection_name"]
+# Module attribute → key under [mongo] in secrets.toml. Values are read on first access
+# (PEP 562 module __getattr__), so importing config never touches st.secrets.
+_MONGO_SECRETS = {
+    "MONGO_URI": "uri",
+    "DB_NAME": "db_name",
+    "COLLECTION_NAME": "collection_name",
+}
+
+
+def __getattr__(name):
+    if name in _MONGO_SECRETS:
+        value = st.secrets["mongo"][_MONGO_SECRETS[name]]
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,12 +3,15 @@ import uuid
 from pathlib import Path
 from pymongo import MongoClient
 import streamlit as st  # Added for secrets access
+from search_index import SearchIndex
+from score_cache import invalidate_candidate_scores
 
 class ResumeDBManager:
     def __init__(self):
         self.client = MongoClient(st.secrets["mongo"]["uri"])
         self.db = self.client[st.secrets["mongo"]["db_name"]]
         self.collection = self.db[st.secrets["mongo"]["collection_name"]]
+        self.search_index = SearchIndex(self.db, st.secrets["mongo"]["collection_name"])
 
     def insert_or_update_resume(self, resume: dict):
         """Upsert a resume based on name, email, or employee_id.
@@ -39,6 +42,8 @@ class ResumeDBManager:
                 result = self.collection.update_one(query, {"$set": resume_update})
                 
                 if result.modified_count > 0:
+                    self.search_index.index_document(self.collection.find_one({"_id": existing_doc["_id"]}))
+                    invalidate_candidate_scores(existing_doc["_id"])
                     print(
                         f"✅ Updated existing resume for {resume.get('name', 'Unknown')} "
                         f"({resume.get('email', 'No email')}) | Employee ID: {resume.get('employee_id', 'N/A')}"
@@ -54,6 +59,7 @@ class ResumeDBManager:
                 if "_id" not in resume:
                     resume["_id"] = str(uuid.uuid4())
                 result = self.collection.insert_one(resume)
+                self.search_index.index_document(resume)
                 print(
                     f"✅ Inserted new resume for {resume.get('name', 'Unknown')} "
                     f"({resume.get('email', 'No email')}) | Employee ID: {resume.get('employee_id', 'N/A')}"
@@ -64,13 +70,14 @@ class ResumeDBManager:
             if "_id" not in resume:
                 resume["_id"] = str(uuid.uuid4())
             result = self.collection.insert_one(resume)
+            self.search_index.index_document(resume)
             print(
                 f"✅ Inserted document with new ID: {result.inserted_id} | Employee ID: {resume.get('employee_id', 'N/A')}"
             )
             return result.inserted_id
         
     def bulk_insert(self, folder_path: str):
-        """Upsert all JSON files in a folder using insert_or_update_resume logic."""
+        """Upsert all JSON files in a folder using insert_or_update_resume logic (which also stores search text)."""
         folder = Path(folder_path)
         files = list(folder.glob("*.json"))
         print(f"📂 Found {len(files)} resumes to insert or update.\n")
@@ -99,14 +106,25 @@ class ResumeDBManager:
             print(f"- {res.get('name')} | {res.get('email')} | ID: {res.get('_id')}")
         return results
 
-    def update_resume(self, update_data: dict):
-        """Update a resume by employee_id."""
-        employee_id = update_data.pop("employee_id", None)
+    def update_resume(self, update_data: dict, employee_id: str = None):
+        """Update a resume by employee_id.
+
+        The employee_id is taken from update_data unless passed explicitly, in which case
+        update_data may itself change the stored employee_id.
+        """
+        if employee_id is None:
+            employee_id = update_data.pop("employee_id", None)
         if not employee_id:
             print("❌ Update failed: 'employee_id' field is required.")
             return None
         result = self.collection.update_one({"employee_id": employee_id}, {"$set": update_data})
         if result.modified_count:
+            updated = self.collection.find_one({"employee_id": update_data.get("employee_id", employee_id)})
+            if updated:
+                self.search_index.index_document(updated)
+                invalidate_candidate_scores(updated["_id"])
+            else:
+                self.search_index.mark_stale()
             print(f"✅ Updated resume with Employee ID {employee_id}")
         else:
             print(f"⚠️ No resume found or no change for Employee ID {employee_id}")
@@ -118,8 +136,11 @@ class ResumeDBManager:
             print("❌ Delete failed: 'employee_id' field is required.")
             return None
 
+        existing_doc = self.collection.find_one({"employee_id": employee_id}, {"_id": 1})
         result = self.collection.delete_one({"employee_id": employee_id})
         if result.deleted_count:
+            self.search_index.unindex_document(existing_doc["_id"])
+            invalidate_candidate_scores(existing_doc["_id"])
             print(f"🗑️ Deleted resume with Employee ID {employee_id}")
         else:
             print(f"⚠️ No resume found with Employee ID {employee_id}")
@@ -128,6 +149,8 @@ class ResumeDBManager:
     def delete_all_resumes(self):
         """Delete all resumes in the collection."""
         result = self.collection.delete_many({})
+        self.search_index.clear()
+        invalidate_candidate_scores()
         print(f"🗑️ Deleted {result.deleted_count} resumes.")
         return result
 
@@ -141,6 +164,7 @@ if __name__ == "__main__":
     parser.add_argument("--update", help="JSON string with _id and fields to update")
     parser.add_argument("--delete", help="JSON string with _id of resume to delete")
     parser.add_argument("--delete-all", action="store_true", help="Delete all resumes in the collection")
+    parser.add_argument("--build-index", action="store_true", help="Rebuild the Boolean search index")
 
     args = parser.parse_args()
     db = ResumeDBManager()
@@ -176,5 +200,8 @@ if __name__ == "__main__":
     elif args.delete_all:
         db.delete_all_resumes()
 
+    elif args.build_index:
+        db.search_index.build()
+
     else:
-        print("⚠️ Please provide one of --file, --folder, --find, --update, or --delete.")
\ No newline at end of file
+        print("⚠️ Please provide one of --file, --folder, --find, --update, --delete, or --build-index.")
\ No newline at end of file
@@ -1,23 +1,38 @@
+import functools
+import hashlib
+import heapq
+from collections import deque
 import json
 import re
 import streamlit as st
 from pymongo import MongoClient
-from boolean.boolean import BooleanAlgebra, Symbol, AND, OR
+from boolean.boolean import BooleanAlgebra, Symbol, AND, OR, NOT
 import config
-import openai
-
-AZURE_OPENAI_API_KEY = st.secrets["azure_openai"]["api_key"]
-AZURE_OPENAI_ENDPOINT = st.secrets["azure_openai"]["endpoint"]
-AZURE_OPENAI_DEPLOYMENT = st.secrets["azure_openai"]["deployment"]
-AZURE_OPENAI_API_VERSION = st.secrets["azure_openai"]["api_version"]
-
-# Create a reusable OpenAI client instance (Azure)
-openai_client = openai.AzureOpenAI(
-    api_key=AZURE_OPENAI_API_KEY,
-    api_version=AZURE_OPENAI_API_VERSION,
-    azure_endpoint=AZURE_OPENAI_ENDPOINT
-)
+from azure_clients import azure_deployment, get_azure_client
+from search_index import SearchIndex, BM25Scorer, SEARCH_FIELDS, bitmap_count, field_term, phrase_words
+from llm_cache import LLMCache, LRUCache
+from parallel_scan import PARALLEL_SCAN_MIN_DOCS, parallel_scan
+
+# Search results rendered per page in the Card View and Table View
+RESULTS_PAGE_SIZE = 20
+
+# Ranked result sets (resume ids and scores only) shared by every session of the server process
+RESULT_CACHE_SIZE = 64
+
+# Natural-language → Boolean conversions already answered by the model, shared on disk
+nl_query_cache = LLMCache()
+NL_QUERY_CACHE_NAMESPACE = "nl_to_boolean"
+
+def nl_query_cache_key(nl_query: str) -> str:
+    """Cache key for an NL query: case- and whitespace-insensitive, scoped to the deployment."""
+    return json.dumps([azure_deployment(), " ".join(nl_query.lower().split())])
+
 def convert_natural_language_to_boolean(nl_query):
+    cache_key = nl_query_cache_key(nl_query)
+    cached = nl_query_cache.get(NL_QUERY_CACHE_NAMESPACE, cache_key)
+    if cached is not None:
+        return cached
+
     prompt = f"""Convert the following natural language query into a Boolean search query.
         Example 1:
         Input: Show me candidates skilled in Java and Spring Boot
@@ -31,16 +46,23 @@ def convert_natural_language_to_boolean(nl_query):
         Input: I want profiles with either machine learning or deep learning but not statistics
         Output: (machinelearning or deeplearning) and not statistics
 
+        Example 4 (keep field:term filters exactly as written):
+        Input: skills:python and company:infosys
+        Output: skills:python and company:infosys
+
         Now, convert this:
         Input: {nl_query}
         Output:"""
 
-    response = openai_client.chat.completions.create(
-        model=AZURE_OPENAI_DEPLOYMENT,
+    response = get_azure_client().chat.completions.create(
+        model=azure_deployment(),
         messages=[{"role": "user", "content": prompt}],
         temperature=0
     )
-    return response.choices[0].message.content.strip()
+    boolean_query = response.choices[0].message.content.strip()
+    if boolean_query:
+        nl_query_cache.put(NL_QUERY_CACHE_NAMESPACE, cache_key, boolean_query)
+    return boolean_query
 
 
 
@@ -76,7 +98,7 @@ class BooleanSearchParser:
             )
 
         # Step 2: split into tokens (operators, parentheses, placeholders, words)
-        tokens = re.findall(r"\(|\)|QUOTED_PHRASE_\d+|\w+", text)
+        tokens = re.findall(r"\(|\)|\w+:(?:QUOTED_PHRASE_\d+|\w+)|QUOTED_PHRASE_\d+|\w+", text)
         result = []
         ops = {"and", "or", "not"}  # Keep operators lowercase for now
 
@@ -102,75 +124,287 @@ class BooleanSearchParser:
         # Convert boolean operators to uppercase just before parsing
         processed = re.sub(r'\b(and|or|not)\b', lambda m: m.group(1).upper(), processed, flags=re.IGNORECASE)
         
-        # Finally parse into Boolean expression tree
-        return self.algebra.parse(processed)
+        # Finally parse into Boolean expression tree and compile it once for all documents
+        return self.compile(self.algebra.parse(processed))
 
+    def compile(self, expr) -> "QueryPlan":
+        """Compile a parsed expression, resolving this parser's quoted-phrase placeholders."""
+        return QueryPlan(expr, self.quoted_phrases)
 
 
+# Query plan
 
+class TermNode:
+    """A single search term: exact word match, or substring match for long terms outside an AND."""
+    def __init__(self, term: str, allow_substring: bool):
+        self.term = term
+        self.allow_substring = allow_substring and len(term) > 4
+        self.pattern = re.compile(r'\b' + re.escape(term) + r'\b')
+        # Free text spanning several words can only be resolved as a phrase in the index
+        self.is_phrase = bool(re.search(r'\W', term))
+        # Longer terms are rarer, so they are checked first under an AND
+        self.cost = 1.0 / (1 + len(term))
 
-def normalize(text: str) -> str:
-    """Lowercase, split CamelCase, remove noise, then inject merged bigrams & halves."""
-    # 1) Split CamelCase: "HuggingFace" → "Hugging Face"
-    text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)
+    def matches(self, text: str) -> bool:
+        # A word-boundary hit is always a substring hit, so the substring test alone suffices
+        if self.allow_substring:
+            return self.term in text
+        return self.pattern.search(text) is not None
 
-    # 2) Lowercase & basic cleanup
-    text = text.lower()
-    text = re.sub(r'(?<![\w@])\.net(?![\w.])', ' dotnet ', text)
-    text = re.sub(r'\S+@\S+', '', text)
-    text = re.sub(r'https?://\S+|www\.\S+', '', text)
+    def match_bits(self, index) -> int:
+        if self.is_phrase:
+            return index.lookup_phrase(self.term)
+        if self.allow_substring:
+            return index.lookup_substring(self.term)
+        return index.lookup(self.term)
+
+    def terms(self) -> set:
+        return {self.term}
+
+    def key(self) -> str:
+        return f"{'~' if self.allow_substring else '='}{self.term}"
+
+
+class PhraseNode:
+    """A quoted phrase, already resolved from its QUOTED_PHRASE_n placeholder."""
+    def __init__(self, phrase: str):
+        self.phrase = phrase.lower()
+        self.cost = 1.0 / (1 + len(self.phrase))
+
+    def matches(self, text: str) -> bool:
+        return self.phrase in text
+
+    def match_bits(self, index) -> int:
+        return index.lookup_phrase(self.phrase)
+
+    def terms(self) -> set:
+        return {self.phrase}
+
+    def key(self) -> str:
+        return f'"{self.phrase}"'
+
+
+class FieldTermNode:
+    """``field:term`` — resolved from that field's postings only, e.g. ``skills:python``."""
+    def __init__(self, field: str, term: str):
+        self.field = field
+        self.term = term
+        self.patterns = [re.compile(r'\b' + re.escape(word) + r'\b') for word in phrase_words(term)]
+        # Narrower than the same bare term, so it runs earlier under an AND
+        self.cost = 0.5 / (1 + len(term))
+
+    def matches(self, text: str) -> bool:
+        # Stored full text has no field boundaries; a scan can only check the words themselves
+        return bool(self.patterns) and all(p.search(text) for p in self.patterns)
+
+    def match_bits(self, index) -> int:
+        return index.lookup_field(self.field, self.term)
+
+    def terms(self) -> set:
+        return {self.term}
+
+    def key(self) -> str:
+        return field_term(self.field, self.term)
+
+
+class NotNode:
+    """Negation; against the index it is a set difference from the matched set, never a rescan."""
+    def __init__(self, child):
+        self.child = child
+        # Exclusions are only worth checking once everything else has matched
+        self.cost = 1.0 + child.cost
+
+    def matches(self, text: str) -> bool:
+        return not self.child.matches(text)
+
+    def match_bits(self, index) -> int:
+        return index.universe() & ~self.child.match_bits(index)
+
+    def terms(self) -> set:
+        # Excluded terms never appear in a match, so there is nothing to highlight
+        return set()
+
+    def key(self) -> str:
+        return f"NOT({self.child.key()})"
+
+
+class AndNode:
+    """Conjunction; children run most-selective first and stop at the first miss."""
+    OPERATOR = "AND"
+
+    def __init__(self, children: list):
+        self.children = sorted(children, key=lambda c: c.cost)
+        self.cost = sum(c.cost for c in self.children)
+
+    def matches(self, text: str) -> bool:
+        return all(child.matches(text) for child in self.children)
+
+    def match_bits(self, index) -> int:
+        required = [c for c in self.children if not isinstance(c, NotNode)]
+        excluded = [c for c in self.children if isinstance(c, NotNode)]
+
+        # Intersect the positive terms first; a pure exclusion query starts from every resume
+        result = None if required else index.universe()
+        for child in required:
+            matches = child.match_bits(index)
+            result = matches if result is None else result & matches
+            if not result:
+                return 0
+
+        # ... then clear each excluded term's bits from what is left
+        for child in excluded:
+            result &= ~child.child.match_bits(index)
+            if not result:
+                return 0
+        return result
+
+    def terms(self) -> set:
+        return set().union(*(c.terms() for c in self.children))
+
+    def key(self) -> str:
+        return f"{self.OPERATOR}({','.join(sorted(c.key() for c in self.children))})"
+
+
+class OrNode:
+    """Disjunction; cheap children run first and evaluation stops at the first hit."""
+    OPERATOR = "OR"
+
+    def __init__(self, children: list):
+        self.children = sorted(children, key=lambda c: c.cost)
+        self.cost = sum(c.cost for c in self.children)
+
+    def matches(self, text: str) -> bool:
+        return any(child.matches(text) for child in self.children)
+
+    def match_bits(self, index) -> int:
+        result = 0
+        for child in self.children:
+            result |= child.match_bits(index)
+        return result
+
+    def terms(self) -> set:
+        return set().union(*(c.terms() for c in self.children))
+
+    def key(self) -> str:
+        return f"{self.OPERATOR}({','.join(sorted(c.key() for c in self.children))})"
+
+
+class NeverNode:
+    """Operators the engine does not evaluate never match."""
+    cost = 0.0
+
+    def matches(self, text: str) -> bool:
+        return False
+
+    def match_bits(self, index) -> int:
+        return 0
+
+    def terms(self) -> set:
+        return set()
+
+    def key(self) -> str:
+        return "NEVER"
+
+
+class QueryPlan:
+    """A Boolean query compiled once (regexes, resolved phrases, evaluation order) and reused for every document."""
+    def __init__(self, expr, quoted_phrases=None):
+        self.expr = expr
+        self.quoted_phrases = dict(quoted_phrases or {})
+        self.root = self._compile(expr)
+        self.search_terms = self.root.terms()
+
+    def _compile(self, expr, in_and: bool = False):
+        if isinstance(expr, Symbol):
+            if str(expr.obj) in self.quoted_phrases:
+                return PhraseNode(self.quoted_phrases[str(expr.obj)])
+            field, sep, value = str(expr.obj).partition(":")
+            if sep and value and field.lower() in SEARCH_FIELDS:
+                return FieldTermNode(field.lower(), self.quoted_phrases.get(value, value).lower())
+            # Bare terms directly under an AND require an exact word match
+            return TermNode(str(expr.obj).lower(), allow_substring=not in_and)
+        elif isinstance(expr, AND):
+            return AndNode([self._compile(arg, in_and=True) for arg in expr.args])
+        elif isinstance(expr, OR):
+            return OrNode([self._compile(arg) for arg in expr.args])
+        elif isinstance(expr, NOT):
+            return NotNode(self._compile(expr.args[0]))
+        return NeverNode()
+
+    def matches(self, text: str) -> bool:
+        """Evaluate against one document's normalized text."""
+        return self.root.matches(text)
+
+    def cache_key(self) -> str:
+        """Stable hash of the compiled query; operand order and quoting placeholders don't affect it."""
+        return hashlib.sha1(self.root.key().encode("utf-8")).hexdigest()
+
+    def match_bits(self, index) -> int:
+        """Evaluate against the inverted index and return the bitmap of matching resume ordinals."""
+        return self.root.match_bits(index)
+
+    def expand_typos(self, index) -> dict:
+        """OR nearby vocabulary terms into every searched-for term that has no matches at all.
+
+        Excluded (NOT) terms and phrases are left alone. Updates the plan in place, so its cache
+        key and highlight terms include the expansions, and returns ``{term: [expansions]}``.
+        """
+        expansions = {}
+        def expand(node):
+            if isinstance(node, TermNode):
+                if node.is_phrase or node.match_bits(index):
+                    return node
+                suggestions = index.suggest(node.term)
+                if not suggestions:
+                    return node
+                expansions[node.term] = suggestions
+                return OrNode([node] + [TermNode(term, allow_substring=False) for term in suggestions])
+            if isinstance(node, (AndNode, OrNode)):
+                return type(node)([expand(child) for child in node.children])
+            return node
+        self.root = expand(self.root)
+        self.search_terms = self.root.terms()
+        return expansions
+
+    def match_ids(self, index) -> set:
+        """Evaluate against the inverted index and return the matching resume ids."""
+        return index.resolve(self.match_bits(index))
+
+    def document_frequencies(self, index) -> dict:
+        """Document frequency of every positive (non-excluded) term, for BM25 ranking."""
+        frequencies = {}
+        def collect(node):
+            if isinstance(node, TermNode):
+                frequencies[node.term] = bitmap_count(node.match_bits(index))
+            elif isinstance(node, PhraseNode):
+                frequencies[node.phrase] = bitmap_count(node.match_bits(index))
+            elif isinstance(node, FieldTermNode):
+                frequencies[node.key()] = bitmap_count(node.match_bits(index))
+            elif isinstance(node, (AndNode, OrNode)):
+                for child in node.children:
+                    collect(child)
+        collect(self.root)
+        return frequencies
 
-    # 3) Capture quoted phrases in the _source text_ and append the no-space form
-    quoted_phrases = re.findall(r'"([^"]+)"', text)
-    for phrase in quoted_phrases:
-        text += " " + phrase.replace(" ", "")
 
-    # 4) Strip quotation marks, remove symbols
-    text = text.replace('"', '')
-    text = re.sub(r'[^\w\s]', ' ', text)
 
-    # 5) Tokenize & inject bigrams + halves
-    words = text.split()
-    # 5a) adjacent-word bigrams
-    for i in range(len(words) - 1):
-        text += " " + words[i] + words[i+1]
-    # 5b) for long merged tokens, also inject a halved split
-    for tok in words:
-        if len(tok) > 8:
-            mid = len(tok) // 2
-            text += f" {tok[:mid]} {tok[mid:]}"
 
-    # 6) Normalize whitespace and ensure single spaces
-    text = re.sub(r'\s+', ' ', text).strip()
-    
-    # 7) Remove duplicate words
-    words = text.split()
-    unique_words = []
-    seen_words = set()
-    for word in words:
-        if word not in seen_words:
-            seen_words.add(word)
-            unique_words.append(word)
-    
-    return ' '.join(unique_words)
-
-# Flattener
-def flatten_json(obj) -> str:
-    parts = []
-    def recurse(x):
-        if isinstance(x, str):
-            parts.append(x)
-        elif isinstance(x, dict):
-            for v in x.values():
-                recurse(v)
-        elif isinstance(x, list):
-            for i in x:
-                recurse(i)
-    recurse(obj)
-    return " ".join(parts)
 
 # Evaluator
 
+@st.cache_resource
+def shared_result_cache() -> LRUCache:
+    """Process-wide cache of ranked result sets, keyed by ``(plan cache_key, collection version)``."""
+    return LRUCache(RESULT_CACHE_SIZE)
+
+def top_k_results(scores: dict, k: int, offset: int = 0) -> list:
+    """Return the ``(resume_id, score)`` pairs ranked ``offset`` to ``offset + k``, best first.
+
+    Uses a bounded heap, so at most ``offset + k`` entries are ever kept in order.
+    """
+    ranked = heapq.nlargest(offset + k, scores.items(), key=lambda item: (item[1], str(item[0])))
+    return ranked[offset:]
+
 def calculate_rank(doc, matched_terms, norm_text):
     """Calculate a relevance score based on number of highlights."""
     # Count total number of matches for all terms
@@ -189,14 +423,16 @@ def calculate_rank(doc, matched_terms, norm_text):
 
 def evaluate_expression(expr, text, quoted_phrases=None):
     """Recursively evaluate Boolean expression against text, with substring fallback."""
+    if isinstance(expr, QueryPlan):
+        return expr.matches(text)
     quoted_phrases = quoted_phrases or {}
     
     if isinstance(expr, Symbol):
         term = str(expr.obj).lower()
         
-        # 1) exact‐phrase placeholders
-        if term.startswith("QUOTED_PHRASE_") and term in quoted_phrases:
-            phrase = quoted_phrases[term].lower()
+        # 1) exact‐phrase placeholders (keys keep the parser's uppercase form)
+        if str(expr.obj) in quoted_phrases:
+            phrase = quoted_phrases[str(expr.obj)].lower()
             return phrase in text
         
         # 2) Special handling for short terms (4 or fewer characters)
@@ -219,8 +455,8 @@ def evaluate_expression(expr, text, quoted_phrases=None):
         for arg in expr.args:
             if isinstance(arg, Symbol):
                 term = str(arg.obj).lower()
-                if term.startswith("QUOTED_PHRASE_") and term in quoted_phrases:
-                    phrase = quoted_phrases[term].lower()
+                if str(arg.obj) in quoted_phrases:
+                    phrase = quoted_phrases[str(arg.obj)].lower()
                     pos = text.find(phrase)
                     if pos == -1:
                         return False
@@ -242,18 +478,31 @@ def evaluate_expression(expr, text, quoted_phrases=None):
             if evaluate_expression(arg, text, quoted_phrases):
                 return True
         return False
+
+    elif isinstance(expr, NOT):
+        return not evaluate_expression(expr.args[0], text, quoted_phrases)
     
     return False
 
+def evaluate_expression_index(expr, index, quoted_phrases=None):
+    """Evaluate a Boolean expression against the inverted index and return the matching resume ids.
+
+    AND/OR/NOT become bitmap intersections/unions/differences over doc ordinals; see QueryPlan.
+    """
+    plan = expr if isinstance(expr, QueryPlan) else QueryPlan(expr, quoted_phrases)
+    return plan.match_ids(index)
+
 def extract_search_terms(expr, quoted_phrases=None):
     """Extract all search terms from the boolean expression for highlighting."""
+    if isinstance(expr, QueryPlan):
+        return set(expr.search_terms)
     quoted_phrases = quoted_phrases or {}
     terms = set()
     
     if isinstance(expr, Symbol):
         term = str(expr.obj).lower()
-        if term.startswith("QUOTED_PHRASE_") and term in quoted_phrases:
-            terms.add(quoted_phrases[term].lower())
+        if str(expr.obj) in quoted_phrases:
+            terms.add(quoted_phrases[str(expr.obj)].lower())
         else:
             terms.add(term)
     elif isinstance(expr, (AND, OR)):
@@ -262,38 +511,106 @@ def extract_search_terms(expr, quoted_phrases=None):
     
     return terms
 
-def highlight_text(text: str, matched_terms: set) -> str:
-    """Highlight matched terms in text using HTML while preserving original case."""
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == '_'
+
+class Highlighter:
+    """Aho–Corasick automaton over the query terms that highlights every term in one pass per string.
+
+    Matches are case-insensitive, must sit on word boundaries (like ``\\bterm\\b``), and
+    overlapping matches resolve leftmost-longest so the emitted spans never nest.
+    """
+    TEMPLATE = '<span style="background-color: #ffeb3b; font-weight: bold;">{}</span>'
+
+    def __init__(self, terms):
+        self.goto = [{}]
+        self.fail = [0]
+        self.lengths = [[]]  # lengths of the terms that end at each state
+        for term in {t.lower() for t in terms if t}:
+            state = 0
+            for ch in term:
+                if ch not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.lengths.append([])
+                    self.goto[state][ch] = len(self.goto) - 1
+                state = self.goto[state][ch]
+            self.lengths[state].append(len(term))
+
+        # Breadth-first pass to wire failure links (depth-1 states fail to the root) and
+        # inherit the outputs of each state's longest proper suffix
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                if state:
+                    self.fail[nxt] = self.goto[fallback].get(ch, 0)
+                self.lengths[nxt] = self.lengths[nxt] + self.lengths[self.fail[nxt]]
+
+    def spans(self, text: str) -> list:
+        """Non-overlapping ``(start, end)`` spans of whole-word term matches in ``text``."""
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # A few characters grow when lowercased; keep offsets aligned with the original
+            lowered = ''.join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+
+        def boundary(pos):
+            before = pos > 0 and _is_word_char(text[pos - 1])
+            after = pos < len(text) and _is_word_char(text[pos])
+            return before != after
+
+        matches = []
+        state = 0
+        for end, ch in enumerate(lowered, start=1):
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            for length in self.lengths[state]:
+                start = end - length
+                if boundary(start) and boundary(end):
+                    matches.append((start, end))
+
+        spans = []
+        last_end = 0
+        for start, end in sorted(matches, key=lambda m: (m[0], m[0] - m[1])):
+            if start >= last_end:
+                spans.append((start, end))
+                last_end = end
+        return spans
+
+    def highlight(self, text: str) -> str:
+        parts = []
+        last_end = 0
+        for start, end in self.spans(text):
+            parts.append(text[last_end:start])
+            parts.append(self.TEMPLATE.format(text[start:end]))
+            last_end = end
+        parts.append(text[last_end:])
+        return ''.join(parts)
+
+@functools.lru_cache(maxsize=32)
+def get_highlighter(terms: frozenset) -> Highlighter:
+    """One automaton per distinct term set, shared across documents and reruns."""
+    return Highlighter(terms)
+
+def highlight_text(text: str, matched_terms) -> str:
+    """Highlight matched terms in text using HTML while preserving original case.
+
+    ``matched_terms`` is a set of terms or a prebuilt Highlighter.
+    """
     if not matched_terms or not text:
         return text
-    
-    # Sort terms by length (longest first) to avoid partial matches
-    sorted_terms = sorted(matched_terms, key=len, reverse=True)
-    
-    # Create a copy of the text to modify
-    highlighted_text = text
-    
-    # Replace each term with its highlighted version
-    for term in sorted_terms:
-        # Escape special characters in the term for regex
-        escaped_term = re.escape(term)
-        # Use word boundaries to match whole words only, case-insensitive
-        pattern = r'\b' + escaped_term + r'\b'
-        
-        # Find all matches with their original case
-        matches = list(re.finditer(pattern, highlighted_text, flags=re.IGNORECASE))
-        
-        # Process matches in reverse order to maintain correct positions
-        for match in reversed(matches):
-            original_text = match.group(0)  # Get the matched text with original case
-            highlighted_text = highlighted_text[:match.start()] + \
-                             f'<span style="background-color: #ffeb3b; font-weight: bold;">{original_text}</span>' + \
-                             highlighted_text[match.end():]
-    
-    return highlighted_text
+    highlighter = matched_terms if isinstance(matched_terms, Highlighter) else get_highlighter(frozenset(matched_terms))
+    return highlighter.highlight(text)
 
-def highlight_dict_values(d: dict, matched_terms: set) -> dict:
+def highlight_dict_values(d: dict, matched_terms) -> dict:
     """Recursively highlight text in dictionary values."""
+    if matched_terms and not isinstance(matched_terms, Highlighter):
+        matched_terms = get_highlighter(frozenset(matched_terms))
     result = {}
     for key, value in d.items():
         if isinstance(value, str):
@@ -320,6 +637,17 @@ def normalize_boolean_operators(query):
     query = re.sub(r'\bnot\b', 'NOT', query, flags=re.IGNORECASE)
     return query
 
+def compile_search_query(search_query: str) -> QueryPlan:
+    """Compile a search box query (after NL conversion and operator normalization) into a plan."""
+    bsp = BooleanSearchParser()
+    if 'AND' in search_query or 'OR' in search_query or 'NOT' in search_query or '"' in search_query or ':' in search_query:
+        return bsp.parse_query(search_query)
+    return bsp.compile(Symbol(search_query.lower()))
+
+def change_results_page(delta: int):
+    """Button callback that moves the search results pager by ``delta`` pages."""
+    st.session_state.search_results_page = max(0, st.session_state.get("search_results_page", 0) + delta)
+
 def render_formatted_resume(resume: dict):
     st.subheader(f"{resume.get('name', 'Candidate')} - Profile")
     # Basic information
@@ -471,12 +799,19 @@ def main():
             - **Simple keyword**: `Python`
             - **AND operator**: `Python AND Django`,'Machine Learning AND Python'.
             - **OR operator**: `JavaScript OR TypeScript`
+            - **NOT operator**: `(MachineLearning OR DeepLearning) AND NOT Statistics`
             - **Grouped logic**: `(Python OR Java) AND (AWS OR Azure)`
+            - **Field search**: `skills:Python AND company:Infosys`, `projects:"machine learning"`
             """)
+        cache_stats = nl_query_cache.stats(NL_QUERY_CACHE_NAMESPACE)
+        st.caption(
+            f"🧠 Query conversion cache: {cache_stats['hits']} hits, "
+            f"{cache_stats['misses']} misses, {cache_stats['entries']} stored"
+        )
         st.divider()
         st.markdown("""
         **About**  
-        Find relevant candidates by matching keywords and phrases in their profiles. Supports Boolean search for precise filtering ad logical searching using AND/OR logics.
+        Find relevant candidates by matching keywords and phrases in their profiles. Supports Boolean search for precise filtering ad logical searching using AND/OR/NOT logics.
         """)
 
     # Main content
@@ -508,23 +843,27 @@ def main():
         return
 
     # Parse Boolean Query
-    bsp = BooleanSearchParser()
-    if 'AND' in search_query or 'OR' in search_query or 'NOT' in search_query or '"' in search_query:
-        try:
-            parsed_query = bsp.parse_query(search_query)
-        except Exception as e:
-            st.error(f"❌ Error parsing query: {e}")
-            return
-    else:
-        parsed_query = Symbol(search_query.lower())
+    try:
+        parsed_query = compile_search_query(search_query)
+    except Exception as e:
+        st.error(f"❌ Error parsing query: {e}")
+        return
 
     # Connect to MongoDB
     try:
         with st.spinner("Connecting to database..."):
             client = MongoClient(config.MONGO_URI)
             coll = client[config.DB_NAME][config.COLLECTION_NAME]
-            docs = list(coll.find({}))
-            st.success(f"📁 Loaded {len(docs)} resumes from database")
+    except Exception as e:
+        st.error(f"❌ Failed to load resumes: {e}")
+        return
+
+    # Cheap metadata check per rerun; when the stored search text is out of sync, the rebuild
+    # below reconciles it (refresh_search_text) before indexing
+    index = SearchIndex(client[config.DB_NAME], config.COLLECTION_NAME)
+    try:
+        if not index.search_text_in_sync():
+            index.mark_stale()
     except Exception as e:
         st.error(f"❌ Failed to load resumes: {e}")
         return
@@ -532,54 +871,101 @@ def main():
     # Search resumes
     st.subheader("🔍 Searching resumes...")
     progress_bar = st.progress(0)
-    
-    # Store unique documents using a dictionary with _id as key
-    unique_matching_docs = {}
-    doc_ranks = {}  # Store ranks for each document
-    
-    for idx, doc in enumerate(docs):
+
+    # Resolve the query against the inverted index, falling back to scanning the stored text
+    result_cache = shared_result_cache()
+    cached = None
+    try:
+        # Read the version before searching, so results computed during a write are never reused
+        cache_key = (parsed_query.cache_key(), index.collection_version())
+        cached = result_cache.get(cache_key)
+    except Exception:
+        cache_key = None
+    if cached is not None:
+        # resume _id → relevance score for every match (no resume bodies), plus typo expansions
+        doc_ranks, expansions = cached
+        st.success(f"⚡ Reused cached results: {len(doc_ranks)} resumes")
+    else:
+        expansions = {}
         try:
-            doc_id = str(doc.get('_id'))
-            
-            # Skip if we've already processed this document
-            if doc_id in unique_matching_docs:
-                continue
-                
-            raw_text = flatten_json(doc)
-            norm_text = normalize(raw_text)
-            
-            # Debug output for search terms
-            if st.session_state.get('debug_search', False):
-                st.write(f"Searching in document {doc_id}:")
-                st.write(f"Normalized text: {norm_text[:200]}...")
-            
-            if evaluate_expression(parsed_query, norm_text, bsp.quoted_phrases):
-                unique_matching_docs[doc_id] = doc
-                # Extract search terms for highlighting
-                search_terms = extract_search_terms(parsed_query, bsp.quoted_phrases)
-                st.session_state[f"matched_terms_{doc_id}"] = search_terms
-                
-                # Calculate rank for this document
-                rank = calculate_rank(doc, search_terms, norm_text)
-                doc_ranks[doc_id] = rank
-                
-                # Pre-highlight the entire document
-                highlighted_doc = highlight_dict_values(doc, search_terms)
-                st.session_state[f"highlighted_doc_{doc_id}"] = highlighted_doc
+            if not index.is_ready():
+                with st.spinner("Building search index..."):
+                    index.build()
+            # Terms with no matches at all are probably misspelled; OR in their nearest indexed terms
+            expansions = parsed_query.expand_typos(index)
+            matched_bits = parsed_query.match_bits(index)
+            scorer = BM25Scorer(index.stats(), parsed_query.document_frequencies(index))
+            doc_ranks = {
+                record["_id"]: scorer.score(record)
+                for record in index.iter_records(matched_bits, scorer.projection(index))
+            }
+            st.success(f"📇 Index matched {len(doc_ranks)} resumes")
         except Exception as e:
-            st.warning(f"⚠️ Error processing document {doc.get('_id')}: {e}")
-        progress_bar.progress((idx + 1) / len(docs))
+            st.warning(f"⚠️ Search index unavailable, scanning all resumes: {e}")
+            doc_ranks = None
+            total = max(index.search_docs.estimated_document_count(), 1)
+            if total >= PARALLEL_SCAN_MIN_DOCS and not st.session_state.get('debug_search', False):
+                try:
+                    # Shard large scans across a process pool; each worker compiles the query once
+                    doc_ranks = parallel_scan(
+                        index.iter_search_text_batches(), search_query, total,
+                        progress_callback=lambda done, count: progress_bar.progress(min(done / count, 1.0)),
+                    )
+                except Exception as e:
+                    st.warning(f"⚠️ Parallel scan failed, scanning in a single process: {e}")
+            if doc_ranks is None:
+                doc_ranks = {}
+                scanned = 0
+                # Stream the stored text one cursor batch at a time; only one batch is ever in memory
+                for batch in index.iter_search_text_batches():
+                    for resume_id, norm_text in batch:
+                        # Debug output for search terms
+                        if st.session_state.get('debug_search', False):
+                            st.write(f"Searching in document {resume_id}:")
+                            st.write(f"Normalized text: {norm_text[:200]}...")
 
-    progress_bar.empty()
+                        if parsed_query.matches(norm_text):
+                            # Highlight counting stands in for BM25F when there is no index
+                            doc_ranks[resume_id] = calculate_rank({"_id": resume_id}, parsed_query.search_terms, norm_text)
+                    scanned += len(batch)
+                    progress_bar.progress(min(scanned / total, 1.0))
+        if cache_key is not None:
+            result_cache.put(cache_key, (doc_ranks, expansions))
 
-    # Get list of unique matching documents and sort by rank
-    matching_docs_list = list(unique_matching_docs.values())
-    # Sort by rank in descending order, then by name for ties
-    matching_docs_list.sort(key=lambda x: (-doc_ranks[str(x.get('_id'))], x.get('name', '').lower()))
+    search_terms = parsed_query.search_terms.union(*expansions.values())
+    for term, suggestions in expansions.items():
+        st.info(f"🔤 No exact match for **{term}**, also searching: {', '.join(suggestions)}")
+
+    progress_bar.empty()
 
     # Display results
-    if matching_docs_list:
-        st.markdown(f"<div class='result-count'>✅ Found {len(matching_docs_list)} matching candidates</div>", unsafe_allow_html=True)
+    if doc_ranks:
+        # Page through the ranking; only the current page is loaded from MongoDB and rendered
+        if st.session_state.get("search_results_query") != search_query:
+            st.session_state.search_results_query = search_query
+            st.session_state.search_results_page = 0
+        page_count = (len(doc_ranks) + RESULTS_PAGE_SIZE - 1) // RESULTS_PAGE_SIZE
+        page = min(st.session_state.search_results_page, page_count - 1)
+        page_results = top_k_results(doc_ranks, RESULTS_PAGE_SIZE, offset=page * RESULTS_PAGE_SIZE)
+
+        try:
+            page_ids = [resume_id for resume_id, _ in page_results]
+            page_docs = {doc["_id"]: doc for doc in coll.find({"_id": {"$in": page_ids}})}
+        except Exception as e:
+            st.error(f"❌ Failed to load resumes: {e}")
+            return
+        matching_docs_list = [page_docs[resume_id] for resume_id in page_ids if resume_id in page_docs]
+        # One automaton for the whole page; highlighted copies are never stored in the session
+        matched_terms = get_highlighter(frozenset(search_terms))
+
+        st.markdown(f"<div class='result-count'>✅ Found {len(doc_ranks)} matching candidates</div>", unsafe_allow_html=True)
+        first = page * RESULTS_PAGE_SIZE
+        st.caption(f"Showing {first + 1}–{first + len(matching_docs_list)} of {len(doc_ranks)} (page {page + 1} of {page_count})")
+        nav_prev, nav_next = st.columns(2)
+        nav_prev.button("← Previous", key="search_prev_page", disabled=page == 0,
+                        on_click=change_results_page, args=(-1,))
+        nav_next.button("Next →", key="search_next_page", disabled=page >= page_count - 1,
+                        on_click=change_results_page, args=(1,))
         
         # Create tabs for different views
         tab1, tab2 = st.tabs(["Card View", "Table View"])
@@ -587,9 +973,7 @@ def main():
         with tab1:
             # Card view
             for doc in matching_docs_list:
-                doc_id = str(doc.get('_id'))
-                matched_terms = st.session_state.get(f"matched_terms_{doc_id}", set())
-                rank = doc_ranks[doc_id]
+                rank = doc_ranks[doc['_id']]
                 
                 with st.container():
                     # Highlight the name and contact info
@@ -605,7 +989,7 @@ def main():
                             📱 {phone}
                         </div>
                         <div class="rank-info">
-                            Number of Matches: {rank}
+                            Relevance Score: {rank:.2f}
                         </div>
                     </div>
                     """, unsafe_allow_html=True)
@@ -636,9 +1020,8 @@ def main():
                             
                             with tabs[0]:
                                 # Formatted structured view
-                                doc_id = str(doc.get('_id'))
-                                matched_terms = st.session_state.get(f"matched_terms_{doc_id}", set())
-                                highlighted_doc = st.session_state.get(f"highlighted_doc_{doc_id}", doc)
+                                # Highlighted on demand, only for the resume being expanded
+                                highlighted_doc = highlight_dict_values(doc, matched_terms)
                                 
                                 render_formatted_resume(highlighted_doc)
                             
@@ -1,25 +1,98 @@
+import asyncio
+import hashlib
 import json
+import os
 import re
-from typing import List, Dict, Set, Tuple
-from pymongo import MongoClient
+from concurrent.futures import as_completed
+from typing import Iterator, List, Dict, Set, Tuple
+from pymongo import MongoClient, TEXT
+from pymongo.errors import OperationFailure
 import streamlit as st
 import config
-import openai
-from openai import AzureOpenAI
+from azure_clients import azure_deployment, azure_event_loop, get_async_azure_client, get_azure_client
+from llm_cache import LLMCache, LRUCache
+from score_cache import SCORE_CACHE_NAMESPACE, keywords_hash, score_cache, score_cache_key
 from bson.objectid import ObjectId
 import time
 import random
 
+# Candidate scoring requests sent to Azure OpenAI at the same time
+SCORING_CONCURRENCY = int(os.environ.get("SCORING_CONCURRENCY", "8"))
+
+# Candidates packed into one batched scoring request; 1 disables batching
+SCORING_BATCH_SIZE = int(os.environ.get("SCORING_BATCH_SIZE", "5"))
+
+# Approximate prompt tokens of candidate details allowed in one batched request
+SCORING_BATCH_TOKEN_BUDGET = int(os.environ.get("SCORING_BATCH_TOKEN_BUDGET", "6000"))
+
+# Most pre-filtered candidates, best text score first, that are passed on to LLM scoring
+PREFILTER_LIMIT = int(os.environ.get("PREFILTER_LIMIT", "200"))
+
+# Text index backing the pre-filter, with per-field weights for the text score
+PREFILTER_INDEX_NAME = "job_prefilter_text"
+PREFILTER_INDEX_WEIGHTS = {
+    "skills": 10,
+    "projects.technologies": 5,
+    "projects.title": 3,
+    "projects.description": 1,
+}
+
+# JD keyword extractions kept in memory per process
+KEYWORD_MEMORY_CACHE_SIZE = 128
+
+# Also persist extracted keywords in the on-disk LLM cache; set JD_KEYWORD_DISK_CACHE=0 to disable
+KEYWORD_DISK_CACHE = os.environ.get("JD_KEYWORD_DISK_CACHE", "1") != "0"
+
+KEYWORD_CACHE_NAMESPACE = "jd_keywords"
+
+keyword_memory_cache = LRUCache(KEYWORD_MEMORY_CACHE_SIZE)
+keyword_cache = LLMCache()
+
+SCORING_RUBRIC = """Evaluation Guidelines:
+1. Primary Focus (80% of score): Skills match with job requirements, Project relevance and implementation of required technologies
+2. Secondary Focus (20% of score): Education relevance, Experience relevance, Certifications
+
+Scoring Rules:
+- Score range: 1-100
+- Focus on exact matches and closely related technologies
+- Higher scores for candidates with multiple, highly relevant matches
+- Lower scores for partial matches or minimal alignment
+- Do not assume or hallucinate missing information
+- Explicitly mention missing required skills in the reason
+
+Status Rules: "Accepted" if score > 70, "Rejected" if score ≤ 70"""
+
+def jd_cache_key(job_description: str) -> str:
+    """Content hash of a JD with whitespace collapsed, scoped to the deployment."""
+    text = " ".join(job_description.split())
+    return hashlib.sha256(json.dumps([azure_deployment(), text]).encode("utf-8")).hexdigest()
+
+def _keyword_result(keywords) -> Dict[str, Set[str]]:
+    keywords = set(keywords)
+    return {
+        "keywords": keywords,
+        "technologies": keywords
+    }
+
 class JobDescriptionAnalyzer:
     def __init__(self):
-        self.client = AzureOpenAI(
-            api_key=st.secrets["azure_openai"]["api_key"],
-            api_version=st.secrets["azure_openai"]["api_version"],
-            azure_endpoint=st.secrets["azure_openai"]["endpoint"]
-        )
+        self.client = get_azure_client()
         
     def extract_keywords(self, job_description: str) -> Dict[str, Set[str]]:
-        """Extract keywords from job description using Azure OpenAI."""
+        """Extract keywords from job description using Azure OpenAI.
+
+        Results are memoized by ``jd_cache_key`` in memory and, unless disabled, on disk, so
+        the same JD is only sent to the model once.
+        """
+        cache_key = jd_cache_key(job_description)
+        cached = keyword_memory_cache.get(cache_key)
+        if cached is None and KEYWORD_DISK_CACHE:
+            cached = keyword_cache.get(KEYWORD_CACHE_NAMESPACE, cache_key)
+            if cached is not None:
+                keyword_memory_cache.put(cache_key, cached)
+        if cached is not None:
+            return _keyword_result(cached)
+
         prompt = f"""You are an AI assistant that extracts ONLY the most relevant and specific keywords from job descriptions. Focus on extracting:
 1. Required technical skills and technologies
 2. Programming languages  
@@ -41,7 +114,7 @@ Extract ONLY the explicitly mentioned technical keywords and return a JSON objec
         
         try:
             response = self.client.chat.completions.create(
-                model=st.secrets["azure_openai"]["deployment"],
+                model=azure_deployment(),
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.1,  # Lower temperature for more focused extraction
                 response_format={ "type": "json_object" }
@@ -55,12 +128,13 @@ Extract ONLY the explicitly mentioned technical keywords and return a JSON objec
                 st.error("Invalid response format from keyword extraction")
                 return {"keywords": set(), "technologies": set()}
             
-            keywords = set(response_data['keywords'])
+            keywords = sorted(set(response_data['keywords']))
+            if keywords:
+                keyword_memory_cache.put(cache_key, keywords)
+                if KEYWORD_DISK_CACHE:
+                    keyword_cache.put(KEYWORD_CACHE_NAMESPACE, cache_key, keywords)
             
-            return {
-                "keywords": keywords,
-                "technologies": keywords
-            }
+            return _keyword_result(keywords)
         except Exception as e:
             st.error(f"Error extracting keywords: {str(e)}")
             return {
@@ -145,7 +219,7 @@ Generate a single, appropriate job title and return nothing else:"""
 
         try:
             response = self.client.chat.completions.create(
-                model=st.secrets["azure_openai"]["deployment"],
+                model=azure_deployment(),
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.3,
                 response_format={"type": "text"}
@@ -178,7 +252,7 @@ Generate a 3-4 sentence professional summary based *only* on the provided inform
 
         try:
             response = self.client.chat.completions.create(
-                model=st.secrets["azure_openai"]["deployment"],
+                model=azure_deployment(),
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.4,
                 response_format={"type": "text"}
@@ -309,7 +383,7 @@ Generate a 3-4 sentence professional summary based *only* on the provided inform
                 )
             try:
                 response = self.client.chat.completions.create(
-                    model=st.secrets["azure_openai"]["deployment"],
+                    model=azure_deployment(),
                     messages=[{"role": "user", "content": summary_prompt}],
                     temperature=0.2,
                     response_format={"type": "text"}
@@ -356,7 +430,7 @@ Return ONLY a number between 0.0 and 1.0 representing the relevance score."""
 
         try:
             response = self.client.chat.completions.create(
-                model=st.secrets["azure_openai"]["deployment"],
+                model=azure_deployment(),
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.1,
                 response_format={"type": "text"}
@@ -468,7 +542,7 @@ Create an enhanced, skill-focused title:"""
 
         try:
             response = self.client.chat.completions.create(
-                model=st.secrets["azure_openai"]["deployment"],
+                model=azure_deployment(),
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.3,  # Slightly higher for more variety
                 response_format={"type": "text"}
@@ -558,7 +632,7 @@ Keywords: {keywords}
         
         try:
             response = self.client.chat.completions.create(
-                model=st.secrets["azure_openai"]["deployment"],
+                model=azure_deployment(),
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.2,
                 response_format={"type": "text"}
@@ -578,14 +652,12 @@ Keywords: {keywords}
 class CandidateScorer:
     def __init__(self, job_keywords: Dict[str, Set[str]]):
         self.job_keywords = job_keywords
-        self.client = AzureOpenAI(
-            api_key=st.secrets["azure_openai"]["api_key"],
-            api_version=st.secrets["azure_openai"]["api_version"],
-            azure_endpoint=st.secrets["azure_openai"]["endpoint"]
-        )
-        
-    def calculate_score(self, candidate: Dict) -> Tuple[int, str]:
-        """Calculate a score for the candidate using Azure OpenAI."""
+        self.client = get_azure_client()
+        self.keywords_digest = keywords_hash(job_keywords["keywords"])
+        self.cache_hits = 0
+
+    def build_prompt(self, candidate: Dict) -> str:
+        """Scoring prompt for one candidate against the JD keywords."""
         # Prepare the evaluation data
         evaluation_data = {
             "job_description": list(self.job_keywords["keywords"]),
@@ -599,21 +671,9 @@ class CandidateScorer:
             }
         }
         
-        prompt = f"""You are an AI designed to evaluate candidate suitability for a job based on pre-extracted job description keywords. Compare the candidate's skills and projects against the job description keywords and assign a holistic match score.
+        return f"""You are an AI designed to evaluate candidate suitability for a job based on pre-extracted job description keywords. Compare the candidate's skills and projects against the job description keywords and assign a holistic match score.
 
-Evaluation Guidelines:
-1. Primary Focus (80% of score): Skills match with job requirements, Project relevance and implementation of required technologies
-2. Secondary Focus (20% of score): Education relevance, Experience relevance, Certifications
-
-Scoring Rules:
-- Score range: 1-100
-- Focus on exact matches and closely related technologies
-- Higher scores for candidates with multiple, highly relevant matches
-- Lower scores for partial matches or minimal alignment
-- Do not assume or hallucinate missing information
-- Explicitly mention missing required skills in the reason
-
-Status Rules: "Accepted" if score > 70, "Rejected" if score ≤ 70
+{SCORING_RUBRIC}
 
 ### Job Description Keywords:
 {json.dumps(evaluation_data["job_description"])}
@@ -633,11 +693,33 @@ Status Rules: "Accepted" if score > 70, "Rejected" if score ≤ 70
   "reason": "<detailed explanation focusing on skills and projects matches>",
   "status": "<'Accepted' if score > 70, 'Rejected' if score <= 70>"
 }}"""
-        
+
+    @staticmethod
+    def parse_response(response_text: str) -> Tuple[int, str]:
+        """Validate a scoring response and return ``(score, reason)``. Raises ValueError if malformed."""
+        result = json.loads(response_text)
+
+        # Validate required fields
+        required_fields = ["score", "reason", "status"]
+        if not all(field in result for field in required_fields):
+            raise ValueError("Missing required fields in response")
+
+        # Ensure score is a number
+        if not isinstance(result["score"], (int, float)):
+            result["score"] = int(result["score"])
+
+        # Ensure status is valid
+        if result["status"] not in ["Accepted", "Rejected"]:
+            result["status"] = "Rejected" if result["score"] <= 70 else "Accepted"
+
+        return result["score"], result["reason"]
+
+    def calculate_score(self, candidate: Dict) -> Tuple[int, str]:
+        """Calculate a score for the candidate using Azure OpenAI."""
         try:
             response = self.client.chat.completions.create(
-                model=st.secrets["azure_openai"]["deployment"],
-                messages=[{"role": "user", "content": prompt}],
+                model=azure_deployment(),
+                messages=[{"role": "user", "content": self.build_prompt(candidate)}],
                 temperature=0.3,
                 response_format={ "type": "json_object" }
             )
@@ -647,23 +729,7 @@ Status Rules: "Accepted" if score > 70, "Rejected" if score ≤ 70
             
             # Try to parse the JSON response
             try:
-                result = json.loads(response_text)
-                
-                # Validate required fields
-                required_fields = ["score", "reason", "status"]
-                if not all(field in result for field in required_fields):
-                    raise ValueError("Missing required fields in response")
-                
-                # Ensure score is a number
-                if not isinstance(result["score"], (int, float)):
-                    result["score"] = int(result["score"])
-                
-                # Ensure status is valid
-                if result["status"] not in ["Accepted", "Rejected"]:
-                    result["status"] = "Rejected" if result["score"] <= 70 else "Accepted"
-                
-                return result["score"], result["reason"]
-                
+                return self.parse_response(response_text)
             except json.JSONDecodeError as e:
                 st.error(f"Invalid JSON response from LLM: {str(e)}")
                 return 0, "Error: Invalid response format from evaluation system"
@@ -672,6 +738,187 @@ Status Rules: "Accepted" if score > 70, "Rejected" if score ≤ 70
             st.error(f"Error evaluating candidate: {str(e)}")
             return 0, f"Error during evaluation: {str(e)}"
 
+    async def calculate_score_async(self, candidate: Dict) -> Tuple[int, str]:
+        """Async ``calculate_score`` on the shared async client.
+
+        Runs on ``azure_event_loop()``, off the Streamlit script thread, so failures are
+        returned as a zero score with the error as the reason instead of calling ``st.error``.
+        """
+        try:
+            response = await get_async_azure_client().chat.completions.create(
+                model=azure_deployment(),
+                messages=[{"role": "user", "content": self.build_prompt(candidate)}],
+                temperature=0.3,
+                response_format={ "type": "json_object" }
+            )
+            response_text = response.choices[0].message.content.strip()
+            try:
+                return self.parse_response(response_text)
+            except json.JSONDecodeError:
+                return 0, "Error: Invalid response format from evaluation system"
+        except Exception as e:
+            return 0, f"Error during evaluation: {str(e)}"
+
+    @staticmethod
+    def candidate_details(candidate: Dict) -> Dict:
+        """The fields of a candidate that are sent for scoring."""
+        return {
+            "mongo_id": str(candidate.get("_id", "N/A")),
+            "name": candidate.get("name", "Unknown"),
+            "skills": candidate.get("skills", []),
+            "projects": candidate.get("projects", []),
+        }
+
+    @staticmethod
+    def estimate_tokens(candidate: Dict) -> int:
+        # ~4 characters per token is close enough to size batches without a tokenizer
+        return len(json.dumps(CandidateScorer.candidate_details(candidate), default=str)) // 4 + 1
+
+    def pack_batches(self, candidates: List[Dict], batch_size: int = SCORING_BATCH_SIZE,
+                     token_budget: int = SCORING_BATCH_TOKEN_BUDGET) -> List[List[Dict]]:
+        """Group candidates into batches of at most ``batch_size`` within ``token_budget``."""
+        batches, batch, batch_tokens = [], [], 0
+        for candidate in candidates:
+            tokens = self.estimate_tokens(candidate)
+            if batch and (len(batch) >= batch_size or batch_tokens + tokens > token_budget):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(candidate)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def build_batch_prompt(self, candidates: List[Dict]) -> str:
+        """Scoring prompt for several candidates; the keywords and rubric are sent once."""
+        details = [self.candidate_details(candidate) for candidate in candidates]
+        return f"""You are an AI designed to evaluate candidate suitability for a job based on pre-extracted job description keywords. Compare each candidate's skills and projects against the job description keywords and assign each one a holistic match score. Score every candidate independently of the others.
+
+{SCORING_RUBRIC}
+
+### Job Description Keywords:
+{json.dumps(list(self.job_keywords["keywords"]))}
+
+### Candidates (JSON array):
+{json.dumps(details, default=str)}
+
+### Required Output Format (JSON):
+{{
+  "results": [
+    {{
+      "mongo_id": "<mongo_id of the candidate, copied exactly>",
+      "score": <number between 1 and 100>,
+      "reason": "<detailed explanation focusing on skills and projects matches>",
+      "status": "<'Accepted' if score > 70, 'Rejected' if score <= 70>"
+    }}
+  ]
+}}
+Return exactly one entry per candidate, {len(details)} in total."""
+
+    @staticmethod
+    def parse_batch_response(response_text: str, expected_ids: Set[str]) -> Dict[str, Tuple[int, str]]:
+        """Map mongo_id → ``(score, reason)`` for every valid entry of a batched response.
+
+        Entries with an unknown or repeated id, or without a usable score and reason, are
+        dropped so that the caller re-scores those candidates on their own.
+        """
+        results = json.loads(response_text).get("results")
+        if not isinstance(results, list):
+            raise ValueError("Batched response has no 'results' array")
+
+        scores = {}
+        for entry in results:
+            if not isinstance(entry, dict):
+                continue
+            mongo_id = str(entry.get("mongo_id"))
+            if mongo_id not in expected_ids or mongo_id in scores:
+                continue
+            try:
+                score = int(entry["score"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            reason = entry.get("reason")
+            if 1 <= score <= 100 and isinstance(reason, str) and reason:
+                scores[mongo_id] = (score, reason)
+        return scores
+
+    async def calculate_batch_scores_async(self, candidates: List[Dict]) -> Dict[str, Tuple[int, str]]:
+        """Score a batch in one request. Returns only the ids the response scored validly."""
+        try:
+            response = await get_async_azure_client().chat.completions.create(
+                model=azure_deployment(),
+                messages=[{"role": "user", "content": self.build_batch_prompt(candidates)}],
+                temperature=0.3,
+                response_format={ "type": "json_object" }
+            )
+            response_text = response.choices[0].message.content.strip()
+            expected_ids = {str(candidate.get("_id", "N/A")) for candidate in candidates}
+            return self.parse_batch_response(response_text, expected_ids)
+        except Exception as e:
+            print(f"⚠️ Batched scoring failed for {len(candidates)} candidates, scoring them one by one: {e}")
+            return {}
+
+    def cache_key(self, candidate: Dict, deployment: str) -> str:
+        details = self.candidate_details(candidate)
+        return score_cache_key(details["mongo_id"], details, self.keywords_digest, deployment)
+
+    def score_candidates(self, candidates: List[Dict], concurrency: int = SCORING_CONCURRENCY,
+                         batch_size: int = SCORING_BATCH_SIZE, use_cache: bool = True) -> Iterator[Tuple[Dict, int, str]]:
+        """Score candidates concurrently, yielding ``(candidate, score, reason)`` as each one finishes.
+
+        Scores cached for the same resume content, keyword set, deployment and prompt version
+        are yielded first without a request (counted in ``cache_hits``); new scores are cached.
+        The remaining candidates are packed into batched requests (see ``pack_batches``); any candidate a
+        batch response leaves out or scores invalidly is re-scored with a single-candidate
+        request. At most ``concurrency`` requests are in flight at once. Closing the generator
+        early (e.g. on a Streamlit rerun) cancels the requests that have not finished.
+        """
+        deployment = azure_deployment()
+        pending = []
+        for candidate in candidates:
+            cached = score_cache.get(SCORE_CACHE_NAMESPACE, self.cache_key(candidate, deployment)) if use_cache else None
+            if cached:
+                self.cache_hits += 1
+                yield candidate, cached[0], cached[1]
+            else:
+                pending.append(candidate)
+        if not pending:
+            return
+
+        loop = azure_event_loop()
+        semaphore = asyncio.run_coroutine_threadsafe(_new_semaphore(concurrency), loop).result()
+
+        async def score_one(candidate):
+            async with semaphore:
+                score, reason = await self.calculate_score_async(candidate)
+            return candidate, score, reason
+
+        async def score_batch(batch):
+            if len(batch) == 1:
+                return [await score_one(batch[0])]
+            async with semaphore:
+                scores = await self.calculate_batch_scores_async(batch)
+            results = [(c, *scores[str(c.get("_id", "N/A"))]) for c in batch if str(c.get("_id", "N/A")) in scores]
+            missing = [c for c in batch if str(c.get("_id", "N/A")) not in scores]
+            return results + list(await asyncio.gather(*(score_one(c) for c in missing)))
+
+        futures = [asyncio.run_coroutine_threadsafe(score_batch(batch), loop)
+                   for batch in self.pack_batches(pending, batch_size=max(1, batch_size))]
+        try:
+            for future in as_completed(futures):
+                for candidate, score, reason in future.result():
+                    # Failed evaluations come back as a zero score and are retried next time
+                    if use_cache and score > 0:
+                        score_cache.put(SCORE_CACHE_NAMESPACE, self.cache_key(candidate, deployment), [score, reason])
+                    yield candidate, score, reason
+        finally:
+            for future in futures:
+                future.cancel()
+
+async def _new_semaphore(value: int) -> asyncio.Semaphore:
+    # Created on the loop that will await it
+    return asyncio.Semaphore(max(1, value))
+
 def convert_objectid_to_str(obj):
     if isinstance(obj, dict):
         return {k: convert_objectid_to_str(v) for k, v in obj.items()}
@@ -684,11 +931,7 @@ def convert_objectid_to_str(obj):
 
 class ResumeRetailor:
     def __init__(self):
-        self.client = AzureOpenAI(
-            api_key=st.secrets["azure_openai"]["api_key"],
-            api_version=st.secrets["azure_openai"]["api_version"],
-            azure_endpoint=st.secrets["azure_openai"]["endpoint"]
-        )
+        self.client = get_azure_client()
     
     def enhance_project_description_car(self, project: Dict, job_keywords: Set[str], jd_given: bool = True) -> str:
         """Enhance project description using enhanced CAR strategy with detailed formatting requirements."""
@@ -723,7 +966,7 @@ Keywords: {keywords}
         
         try:
             response = self.client.chat.completions.create(
-                model=st.secrets["azure_openai"]["deployment"],
+                model=azure_deployment(),
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.2,
                 response_format={"type": "text"}
@@ -765,7 +1008,7 @@ Generate a professional job title that matches their experience level and aligns
 
         try:
             response = self.client.chat.completions.create(
-                model=st.secrets["azure_openai"]["deployment"],
+                model=azure_deployment(),
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.3,
                 response_format={"type": "text"}
@@ -875,7 +1118,7 @@ Create an enhanced, skill-focused title:"""
 
         try:
             response = self.client.chat.completions.create(
-                model=st.secrets["azure_openai"]["deployment"],
+                model=azure_deployment(),
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.3,  # Slightly higher for more variety
                 response_format={"type": "text"}
@@ -1021,7 +1264,7 @@ Return ONLY a number between 0.0 and 1.0 representing the relevance score."""
 
         try:
             response = self.client.chat.completions.create(
-                model=st.secrets["azure_openai"]["deployment"],
+                model=azure_deployment(),
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.1,
                 response_format={"type": "text"}
@@ -1153,7 +1396,7 @@ Return the complete resume with original skills kept as provided, ALL projects (
 
         try:
             response = self.client.chat.completions.create(
-                model=st.secrets["azure_openai"]["deployment"],
+                model=azure_deployment(),
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.1,
                 response_format={ "type": "json_object" }
@@ -1213,53 +1456,112 @@ Return the complete resume with original skills kept as provided, ALL projects (
                 
         return True
 
+@st.cache_resource(show_spinner=False)
+def ensure_prefilter_index(_collection, full_name: str) -> bool:
+    """Create the pre-filter text index once per process. Returns False if it cannot be used.
+
+    ``create_index`` is a no-op when the same index already exists. A collection holds at most
+    one text index, so a conflicting one leaves the pre-filter on its regex fallback.
+    """
+    try:
+        _collection.create_index(
+            [(field, TEXT) for field in PREFILTER_INDEX_WEIGHTS],
+            name=PREFILTER_INDEX_NAME,
+            weights=PREFILTER_INDEX_WEIGHTS,
+            default_language="english",
+        )
+        return True
+    except (OperationFailure, NotImplementedError) as e:
+        print(f"⚠️ Pre-filter text index unavailable on {full_name}, using regex matching: {e}")
+        return False
+
+def text_search_string(keywords: Set[str]) -> str:
+    """``$text`` search string that matches any of the keywords.
+
+    Quotes would make a term required and a leading '-' would negate it, so both are stripped.
+    """
+    words = re.sub(r'["\\]', " ", " ".join(keywords)).split()
+    return " ".join(word.lstrip("-") for word in words if word.lstrip("-"))
+
 class JobMatcher:
     def __init__(self):
         self.client = MongoClient(config.MONGO_URI)
         self.db = self.client[config.DB_NAME]
         self.collection = self.db[config.COLLECTION_NAME]
         self.resume_retailor = ResumeRetailor()
+        self.text_index_ready = ensure_prefilter_index(self.collection, self.collection.full_name)
         
-    def pre_filter_candidates(self, keywords: Set[str]) -> List[Dict]:
-        """Pre-filter candidates based on skills and projects."""
+    def pre_filter_candidates(self, keywords: Set[str], limit: int = PREFILTER_LIMIT) -> List[Dict]:
+        """Pre-filter candidates based on skills and projects.
+
+        Uses the pre-filter text index and returns at most ``limit`` candidates, best text
+        score first. Without the index, falls back to case-insensitive regex matching.
+        """
         if not keywords:
             st.warning("No keywords extracted from job description")
             return []
-            
-        # Convert keywords to lowercase for case-insensitive matching
-        keywords_lower = [k.lower() for k in keywords]
-        
-        # Build the MongoDB query
-        query = {
-            "$or": [
-                # Match in skills array
-                {"skills": {"$in": keywords_lower}},
-                # Match in projects description
-                {"projects.description": {"$regex": "|".join(keywords_lower), "$options": "i"}},
-                # Match in projects technologies
-                {"projects.technologies": {"$in": keywords_lower}}
-            ]
-        }
         
         try:
-            # Execute the query with a limit
-            candidates = list(self.collection.find(query))
+            candidates = None
+            if self.text_index_ready:
+                try:
+                    candidates = self._text_prefilter(keywords, limit)
+                except OperationFailure as e:
+                    # e.g. the text index was dropped after startup
+                    print(f"⚠️ Text pre-filter failed, using regex matching: {e}")
+            if candidates is None:
+                candidates = self._regex_prefilter(keywords, limit)
             if not candidates:
                 st.info("No candidates found matching the keywords")
+            elif len(candidates) >= limit:
+                st.info(f"Scoring the {limit} best keyword matches")
             return candidates
         except Exception as e:
             st.error(f"Error querying database: {str(e)}")
             return []
+
+    def _text_prefilter(self, keywords: Set[str], limit: int) -> List[Dict]:
+        search = text_search_string(keywords)
+        if not search:
+            return []
+        cursor = self.collection.find(
+            {"$text": {"$search": search}},
+            {"_prefilter_score": {"$meta": "textScore"}},
+        ).sort([("_prefilter_score", {"$meta": "textScore"})]).limit(limit)
+        candidates = list(cursor)
+        for candidate in candidates:
+            candidate.pop("_prefilter_score", None)
+        return candidates
+
+    def _regex_prefilter(self, keywords: Set[str], limit: int) -> List[Dict]:
+        # One case-insensitive alternation per field; this scans the collection
+        pattern = "|".join(re.escape(k) for k in keywords)
+        exact = "^(?:" + pattern + ")$"
+        query = {
+            "$or": [
+                # Match in skills array
+                {"skills": {"$regex": exact, "$options": "i"}},
+                # Match in projects description
+                {"projects.description": {"$regex": pattern, "$options": "i"}},
+                # Match in projects technologies
+                {"projects.technologies": {"$regex": exact, "$options": "i"}}
+            ]
+        }
+        return list(self.collection.find(query).limit(limit))
         
-    def find_matching_candidates(self, job_description: str, progress_bar=None, status_text=None) -> List[Dict]:
-        """Find and score candidates matching the job description."""
+    def find_matching_candidates(self, job_description: str, progress_bar=None, status_text=None,
+                                 keywords: Dict[str, Set[str]] = None) -> List[Dict]:
+        """Find and score candidates matching the job description.
+
+        Pass ``keywords`` when the caller already ran ``extract_keywords`` on the same JD.
+        """
         if not job_description.strip():
             st.error("Please provide a job description")
             return []
             
         # Extract keywords from job description
-        analyzer = JobDescriptionAnalyzer()
-        keywords = analyzer.extract_keywords(job_description)
+        if keywords is None:
+            keywords = JobDescriptionAnalyzer().extract_keywords(job_description)
         
         
         # Pre-filter candidates based on keywords
@@ -1268,36 +1570,35 @@ class JobMatcher:
         if not candidates:
             return []
         
-        # Score each pre-filtered candidate
+        # Score the pre-filtered candidates concurrently, in completion order
         scored_candidates = []
         total_candidates = len(candidates)
+        scorer = CandidateScorer(keywords)
         
-        for idx, candidate in enumerate(candidates):
+        for idx, (candidate, score, reason) in enumerate(scorer.score_candidates(candidates)):
             # Update progress
             if progress_bar and status_text:
                 progress = (idx + 1) / total_candidates
                 progress_bar.progress(progress)
-                status_text.text(f"Evaluating candidate {idx + 1} of {total_candidates}")
+                status_text.text(f"Evaluated candidate {idx + 1} of {total_candidates}")
             
-            try:
-                scorer = CandidateScorer(keywords)
-                score, reason = scorer.calculate_score(candidate)
-                
-                # Only include candidates with score > 0
-                if score > 0:
-                    scored_candidates.append({
-                        "mongo_id": str(candidate.get("_id")),
-                        "name": candidate.get("name", "Unknown"),
-                        "phone": candidate.get("phone", "N/A"),
-                        "email": candidate.get("email", "N/A"),
-                        "score": score,
-                        "reason": reason,
-                        "status": "Accepted" if score > 70 else "Rejected",
-                        "resume": candidate
-                    })
-            except Exception as e:
-                st.error(f"Error evaluating candidate {candidate.get('name', 'Unknown')}: {str(e)}")
-                continue
+            # Only include candidates with score > 0
+            if score > 0:
+                scored_candidates.append({
+                    "mongo_id": str(candidate.get("_id")),
+                    "name": candidate.get("name", "Unknown"),
+                    "phone": candidate.get("phone", "N/A"),
+                    "email": candidate.get("email", "N/A"),
+                    "score": score,
+                    "reason": reason,
+                    "status": "Accepted" if score > 70 else "Rejected",
+                    "resume": candidate
+                })
+            else:
+                st.error(f"Error evaluating candidate {candidate.get('name', 'Unknown')}: {reason}")
+        
+        if scorer.cache_hits:
+            st.info(f"⚡ Reused cached scores for {scorer.cache_hits} of {total_candidates} candidates")
         
         # Sort by score in descending order
         scored_candidates.sort(key=lambda x: x["score"], reverse=True)
@@ -0,0 +1,180 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Optional
+
+# Default location of the shared on-disk cache; override with the LLM_CACHE_PATH environment variable
+DEFAULT_CACHE_PATH = Path(".cache") / "llm_cache.sqlite3"
+
+# Entries older than this are treated as misses and dropped
+DEFAULT_TTL_SECONDS = 30 * 24 * 60 * 60
+
+# Per-namespace entry limit; the least recently used entries are evicted beyond it
+DEFAULT_MAX_ENTRIES = 5000
+
+
+class LRUCache:
+    """Thread-safe bounded mapping that evicts the least recently used entry."""
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class LLMCache:
+    """Persistent key/value cache for LLM responses, backed by SQLite.
+
+    Entries are grouped by ``namespace`` (one per kind of call) and looked up by a string key.
+    Values are stored as JSON. Each namespace is bounded by ``max_entries`` (least recently used
+    entries are evicted first) and every entry expires ``ttl_seconds`` after it was written.
+    Hit and miss counters are kept per process and reported by ``stats()``.
+
+    A connection is opened per operation, so one instance can be shared between Streamlit
+    sessions and threads. Any SQLite error is printed and treated as a miss; the cache never
+    breaks the call it wraps.
+    """
+
+    def __init__(self, path=None, ttl_seconds: int = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = Path(path or os.environ.get("LLM_CACHE_PATH", DEFAULT_CACHE_PATH))
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    @contextmanager
+    def _open(self):
+        """Yield a connection that commits on success and is always closed."""
+        if not self._initialized:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            if not self._initialized:
+                conn.execute(
+                    """CREATE TABLE IF NOT EXISTS responses (
+                        namespace TEXT NOT NULL,
+                        key TEXT NOT NULL,
+                        value TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        accessed_at REAL NOT NULL,
+                        PRIMARY KEY (namespace, key)
+                    )"""
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (namespace, accessed_at)")
+                self._initialized = True
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """Return the cached value, or None when it is missing or expired."""
+        now = time.time()
+        try:
+            with self._open() as conn:
+                row = conn.execute(
+                    "SELECT value, created_at FROM responses WHERE namespace = ? AND key = ?",
+                    (namespace, key),
+                ).fetchone()
+                if row and now - row[1] <= self.ttl_seconds:
+                    conn.execute(
+                        "UPDATE responses SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                        (now, namespace, key),
+                    )
+                    self._count(hit=True)
+                    return json.loads(row[0])
+                if row:
+                    conn.execute("DELETE FROM responses WHERE namespace = ? AND key = ?", (namespace, key))
+        except (sqlite3.Error, OSError, ValueError) as e:
+            print(f"⚠️ LLM cache read failed: {e}")
+        self._count(hit=False)
+        return None
+
+    def put(self, namespace: str, key: str, value: Any):
+        """Store a JSON-serializable value and evict the oldest entries beyond ``max_entries``."""
+        now = time.time()
+        try:
+            with self._open() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (namespace, key, value, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (namespace, key, json.dumps(value), now, now),
+                )
+                conn.execute(
+                    "DELETE FROM responses WHERE namespace = ? AND key IN ("
+                    "SELECT key FROM responses WHERE namespace = ? ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (namespace, namespace, self.max_entries),
+                )
+        except (sqlite3.Error, OSError, TypeError, ValueError) as e:
+            print(f"⚠️ LLM cache write failed: {e}")
+
+    def delete_prefix(self, namespace: str, prefix: str):
+        """Drop every entry of ``namespace`` whose key starts with ``prefix``."""
+        try:
+            with self._open() as conn:
+                conn.execute(
+                    "DELETE FROM responses WHERE namespace = ? AND substr(key, 1, ?) = ?",
+                    (namespace, len(prefix), prefix),
+                )
+        except (sqlite3.Error, OSError) as e:
+            print(f"⚠️ LLM cache delete failed: {e}")
+
+    def clear(self, namespace: Optional[str] = None):
+        """Drop every entry, or only those of one namespace."""
+        try:
+            with self._open() as conn:
+                if namespace is None:
+                    conn.execute("DELETE FROM responses")
+                else:
+                    conn.execute("DELETE FROM responses WHERE namespace = ?", (namespace,))
+        except (sqlite3.Error, OSError) as e:
+            print(f"⚠️ LLM cache clear failed: {e}")
+
+    def stats(self, namespace: Optional[str] = None) -> dict:
+        """Hit and miss counts for this process, plus the number of stored entries.
+
+        Pass ``namespace`` to count only that namespace's entries; the hit and miss counts
+        always cover every namespace this instance has served.
+        """
+        entries = 0
+        try:
+            with self._open() as conn:
+                if namespace is None:
+                    entries = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+                else:
+                    entries = conn.execute(
+                        "SELECT COUNT(*) FROM responses WHERE namespace = ?", (namespace,)
+                    ).fetchone()[0]
+        except (sqlite3.Error, OSError) as e:
+            print(f"⚠️ LLM cache stats failed: {e}")
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
@@ -8,7 +8,7 @@ from datetime import datetime
 import copy
 from pdf_utils import PDFUtils  # Import the new class
 from docx_utils import DocxUtils # Import the DocxUtils class
-from openai import AzureOpenAI
+from azure_clients import azure_deployment, get_azure_client
 from llama_resume_parser import ResumeParser
 from standardizer import ResumeStandardizer
 from db_manager import ResumeDBManager
@@ -566,7 +566,8 @@ elif page == "JD-Resume Regeneration":
                 results = matcher.find_matching_candidates(
                     job_description,
                     progress_bar=progress,
-                    status_text=status
+                    status_text=status,
+                    keywords=kw
                 )
                 st.session_state.job_matcher_results = results
             progress.empty()
@@ -1162,13 +1163,9 @@ elif page == "JD-Resume Regeneration":
                                             f"You are an expert HR professional. You MUST infer and assign a professional job title for the candidate based on the job description and their experience/skills. Do not leave the title blank. If unsure, use the most relevant title from the job description. Then, write a detailed, information-rich, single-paragraph professional summary (8-10 sentences) to introduce the following candidate to a client for a job opportunity. The summary should be written in third person, using formal and business-appropriate language, and should avoid any informal, overly enthusiastic, or emotional expressions. The summary must be comprehensive and cover the candidate's technical expertise, relevant experience, key achievements, major projects, technologies and frameworks used, leadership, teamwork, impact, and educational background as they pertain to the job description. Be specific about programming languages, frameworks, tools, and platforms the candidate has worked with. Mention any certifications or notable accomplishments. The summary should reflect high ethical standards and professionalism, and should not include any bullet points, excitement, or casual language. Use only facts from the provided information and do not invent or exaggerate. The summary should be suitable for inclusion in a formal client communication and should be at least 8-10 sentences long.\n\nReturn your response as a JSON object with two fields: 'title' and 'summary'.\n\nCandidate Information:\nName: {resume_data.get('name', '')}\nTitle: {resume_data.get('title', '')}\nSummary: {resume_data.get('summary', '')}\nSkills: {', '.join(resume_data.get('skills', []))}\n\nProjects:\n{json.dumps(resume_data.get('projects', []), indent=2)}\n\nEducation:\n{json.dumps(resume_data.get('education', []), indent=2)}\n\nJob Description:\n{job_description}"
                                         )
                                         try:
-                                            client = AzureOpenAI(
-                                                api_key=st.secrets["azure_openai"]["api_key"],
-                                                api_version=st.secrets["azure_openai"]["api_version"],
-                                                azure_endpoint=st.secrets["azure_openai"]["endpoint"]
-                                            )
+                                            client = get_azure_client()
                                             response = client.chat.completions.create(
-                                                model=st.secrets["azure_openai"]["deployment"],
+                                                model=azure_deployment(),
                                                 messages=[
                                                     {"role": "system", "content": "You are an expert HR professional who writes compelling candidate summaries."},
                                                     {"role": "user", "content": summary_prompt}
@@ -1780,13 +1777,9 @@ elif page == "JD-Resume Regeneration":
                                     f"You are an expert HR professional. You MUST infer and assign a professional job title for the candidate based on the job description and their experience/skills. Do not leave the title blank. If unsure, use the most relevant title from the job description. Then, write a detailed, information-rich, single-paragraph professional summary (8-10 sentences) to introduce the following candidate to a client for a job opportunity. The summary should be written in third person, using formal and business-appropriate language, and should avoid any informal, overly enthusiastic, or emotional expressions. The summary must be comprehensive and cover the candidate's technical expertise, relevant experience, key achievements, major projects, technologies and frameworks used, leadership, teamwork, impact, and educational background as they pertain to the job description. Be specific about programming languages, frameworks, tools, and platforms the candidate has worked with. Mention any certifications or notable accomplishments. The summary should reflect high ethical standards and professionalism, and should not include any bullet points, excitement, or casual language. Use only facts from the provided information and do not invent or exaggerate. The summary should be suitable for inclusion in a formal client communication and should be at least 8-10 sentences long.\n\nReturn your response as a JSON object with two fields: 'title' and 'summary'.\n\nCandidate Information:\nName: {st.session_state.resume_data.get('name', '')}\nTitle: {st.session_state.resume_data.get('title', '')}\nSummary: {st.session_state.resume_data.get('summary', '')}\nSkills: {', '.join(st.session_state.resume_data.get('skills', []))}\n\nProjects:\n{json.dumps(st.session_state.resume_data.get('projects', []), indent=2)}\n\nEducation:\n{json.dumps(st.session_state.resume_data.get('education', []), indent=2)}\n\nJob Description:\n{job_description_single}"
                             )
                             try:
-                                client = AzureOpenAI(
-                                    api_key=st.secrets["azure_openai"]["api_key"],
-                                    api_version=st.secrets["azure_openai"]["api_version"],
-                                    azure_endpoint=st.secrets["azure_openai"]["endpoint"]
-                                )
+                                client = get_azure_client()
                                 response = client.chat.completions.create(
-                                    model=st.secrets["azure_openai"]["deployment"],
+                                    model=azure_deployment(),
                                     messages=[
                                         {"role": "system", "content": "You are an expert HR professional who writes compelling candidate summaries."},
                                         {"role": "user", "content": summary_prompt}
@@ -2070,12 +2063,12 @@ elif page == "Database Management":
                                                             "location": edited_location,
                                                             "skills": [skill.strip() for skill in edited_skills.split(",") if skill.strip()]
                                                         }
-                                                        result = db_manager.collection.update_one(
-                                                            {"employee_id": selected_resume.get("employee_id")},
-                                                            {"$set": updated_data}
+                                                        result = db_manager.update_resume(
+                                                            updated_data,
+                                                            employee_id=selected_resume.get("employee_id")
                                                         )
                                                         
-                                                        if result.modified_count > 0:
+                                                        if result and result.modified_count > 0:
                                                             st.success("✅ Resume updated successfully!")
                                                             # Reset states and refresh data
                                                             st.session_state.current_view_mode = "list"
@@ -0,0 +1,75 @@
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Scans of collections at least this large are sharded across a process pool
+PARALLEL_SCAN_MIN_DOCS = int(os.environ.get("PARALLEL_SCAN_MIN_DOCS", "20000"))
+
+# Worker processes for a parallel scan; 0 means one per CPU core
+PARALLEL_SCAN_WORKERS = int(os.environ.get("PARALLEL_SCAN_WORKERS", "0")) or os.cpu_count() or 1
+
+# Compiled query plan held by each worker process, set once by the pool initializer
+_worker_plan = None
+
+
+def _init_worker(search_query: str):
+    global _worker_plan
+    from final_retriever import compile_search_query
+
+    _worker_plan = compile_search_query(search_query)
+
+
+def _scan_batch(batch: List[Tuple]) -> Tuple[int, List[Tuple]]:
+    """Evaluate one batch in a worker. Returns the batch size and ``(resume_id, rank)`` per match."""
+    from final_retriever import calculate_rank
+
+    search_terms = _worker_plan.search_terms
+    matches = [
+        (resume_id, calculate_rank({"_id": resume_id}, search_terms, norm_text))
+        for resume_id, norm_text in batch
+        if _worker_plan.matches(norm_text)
+    ]
+    return len(batch), matches
+
+
+def parallel_scan(
+    batches: Iterable[List[Tuple]],
+    search_query: str,
+    total: int,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    workers: int = PARALLEL_SCAN_WORKERS,
+) -> Dict:
+    """Scan ``(resume_id, normalized_text)`` batches across a process pool.
+
+    Every worker compiles ``search_query`` once and evaluates whole batches, so only the batch
+    text and the matching ids cross process boundaries. At most two batches per worker are in
+    flight, which keeps memory bounded while the cursor streams. Returns resume _id → rank.
+    """
+    ranks = {}
+    scanned = 0
+
+    def collect(done):
+        nonlocal scanned
+        for future in done:
+            size, matches = future.result()
+            ranks.update(matches)
+            scanned += size
+            if progress_callback:
+                progress_callback(scanned, max(total, scanned))
+
+    # spawn rather than fork: the Streamlit server is multi-threaded
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(search_query,),
+    ) as pool:
+        pending = set()
+        for batch in batches:
+            pending.add(pool.submit(_scan_batch, batch))
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        collect(wait(pending).done)
+    return ranks
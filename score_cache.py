@@ -0,0 +1,39 @@
+import hashlib
+import json
+from typing import Dict, Iterable
+
+from llm_cache import LLMCache
+
+# LLMCache namespace holding candidate scores
+SCORE_CACHE_NAMESPACE = "candidate_scores"
+
+# Bump whenever the scoring prompts or rubric change so older scores are not reused
+SCORING_PROMPT_VERSION = 1
+
+score_cache = LLMCache()
+
+
+def _digest(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:32]
+
+
+def keywords_hash(keywords: Iterable[str]) -> str:
+    """Order-independent hash of a JD keyword set."""
+    return _digest(sorted(keywords))
+
+
+def score_cache_key(mongo_id: str, details: Dict, keywords_digest: str, deployment: str) -> str:
+    """Cache key for one candidate's score.
+
+    It starts with the resume id so all of a resume's scores can be dropped at once, and
+    includes a hash of the scored fields so edits made outside ResumeDBManager still miss.
+    """
+    return f"{mongo_id}|{_digest(details)}|{keywords_digest}|{deployment}|v{SCORING_PROMPT_VERSION}"
+
+
+def invalidate_candidate_scores(mongo_id=None):
+    """Forget the cached scores of one resume, or of every resume when ``mongo_id`` is None."""
+    if mongo_id is None:
+        score_cache.clear(SCORE_CACHE_NAMESPACE)
+    else:
+        score_cache.delete_prefix(SCORE_CACHE_NAMESPACE, f"{mongo_id}|")
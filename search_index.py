@@ -0,0 +1,1064 @@
+import math
+import re
+import sys
+import threading
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+
+# Bump whenever the on-disk layout of the index changes so stale indexes get rebuilt
+INDEX_VERSION = 7
+
+# Bump whenever normalize() or the stored per-resume search fields change so they get recomputed
+NORMALIZER_VERSION = 5
+
+# Postings are written in batches to keep individual insert_many calls small
+BUILD_BATCH_SIZE = 1000
+
+# Typo tolerance: terms shorter than FUZZY_MIN_LENGTH are never expanded; longer ones allow
+# one edit, and terms of FUZZY_LONG_LENGTH or more allow two
+FUZZY_MIN_LENGTH = 5
+FUZZY_LONG_LENGTH = 8
+FUZZY_MAX_EXPANSIONS = 3
+
+# Incremental writes add and remove ordinals through a posting's "added"/"removed" sets; once
+# either set grows past this many entries it is folded back into the packed containers
+OVERLAY_COMPACT_SIZE = 1024
+
+# Resumes fetched per cursor round trip when scanning stored text without the index
+SCAN_BATCH_SIZE = 500
+
+# BM25F parameters; top-level resume fields not listed here are weighted 1.0
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Fields searchable on their own with "field:term" syntax: name → path into the resume.
+# Each gets its own postings, keyed "field:term" and kept apart from the plain terms.
+SEARCH_FIELDS = {
+    "skills": ("skills",),
+    "projects": ("projects",),
+    "experience": ("experience",),
+    "education": ("education",),
+    "certifications": ("certifications",),
+    "location": ("location",),
+    "company": ("experience", "company"),
+}
+
+FIELD_WEIGHTS = {
+    "skills": 3.0,
+    "projects": 2.0,
+    "experience": 2.0,
+    "certifications": 1.5,
+    "summary": 1.0,
+    "education": 0.5,
+}
+
+# Roaring-style containers: ordinals are split into 65536-wide chunks, and each chunk is
+# stored as a sorted uint16 array when sparse or as a raw 8 KiB bitmap when dense
+CONTAINER_BITS = 1 << 16
+ARRAY_CONTAINER_MAX = 4096
+
+
+_CAMEL_CASE_RE = re.compile(r'([a-z])([A-Z])')
+_DOTNET_RE = re.compile(r'(?<![\w@])\.net(?![\w.])')
+# Emails (any whitespace-delimited run containing "@") and URLs, stripped in one pass
+_NOISE_RE = re.compile(r'\S+@\S+|https?://\S+|www\.\S+')
+_QUOTED_RE = re.compile(r'"([^"]+)"')
+_SYMBOL_RE = re.compile(r'[^\w\s]')
+
+
+def _clean(text: str) -> str:
+    """Split CamelCase, lowercase, rewrite .net and strip emails and URLs."""
+    text = _CAMEL_CASE_RE.sub(r'\1 \2', text).lower()
+    text = _DOTNET_RE.sub(' dotnet ', text)
+    return _NOISE_RE.sub('', text)
+
+def _words(text: str) -> List[str]:
+    return _SYMBOL_RE.sub(' ', text.replace('"', '')).split()
+
+def iter_tokens(text: str) -> Iterator[str]:
+    """Yield normalize()'s tokens in order, duplicates included.
+
+    Words first (each quoted phrase also contributes its no-space form), then the merged
+    bigram of every adjacent pair, then both halves of every word longer than 8 characters.
+    """
+    text = _clean(text)
+    words = _words(text)
+    for phrase in _QUOTED_RE.findall(text):
+        words.extend(_words(phrase.replace(" ", "")))
+    yield from words
+    yield from map(str.__add__, words, words[1:])
+    for tok in words:
+        if len(tok) > 8:
+            mid = len(tok) // 2
+            yield tok[:mid]
+            yield tok[mid:]
+
+def normalize(text: str) -> str:
+    """Lowercase, split CamelCase, remove noise, then inject merged bigrams & halves."""
+    return ' '.join(dict.fromkeys(iter_tokens(text)))
+
+def phrase_words(text: str) -> List[str]:
+    """The plain word stream normalize() derives from a string, before bigrams and halves are injected."""
+    return _words(_clean(text))
+
+# Flattener
+def iter_strings(obj) -> Iterator[str]:
+    """Yield every string leaf of a nested resume, in document order."""
+    if isinstance(obj, str):
+        yield obj
+    elif isinstance(obj, dict):
+        for v in obj.values():
+            yield from iter_strings(v)
+    elif isinstance(obj, list):
+        for i in obj:
+            yield from iter_strings(i)
+
+def iter_leaves(obj, path: Tuple[str, ...] = ()) -> Iterator[Tuple[Tuple[str, ...], str]]:
+    """Like iter_strings, but also yield the dict keys leading to each string (list indices skipped)."""
+    if isinstance(obj, str):
+        yield path, obj
+    elif isinstance(obj, dict):
+        for k, v in obj.items():
+            yield from iter_leaves(v, path + (k,))
+    elif isinstance(obj, list):
+        for i in obj:
+            yield from iter_leaves(i, path)
+
+def flatten_json(obj) -> str:
+    return " ".join(iter_strings(obj))
+
+def _without_id(doc: dict) -> dict:
+    return {k: v for k, v in doc.items() if k != "_id"}
+
+def search_text(doc: dict) -> str:
+    """Normalized search text for a resume, excluding its _id."""
+    return normalize(flatten_json(_without_id(doc)))
+
+def field_value(doc: dict, path: Tuple[str, ...]):
+    """Follow a SEARCH_FIELDS path into a resume, collecting values across lists of entries."""
+    value = doc.get(path[0])
+    for key in path[1:]:
+        if isinstance(value, list):
+            value = [item.get(key) for item in value if isinstance(item, dict)]
+        elif isinstance(value, dict):
+            value = value.get(key)
+        else:
+            return None
+    return value
+
+def field_texts(doc: dict) -> Dict[str, str]:
+    """Normalized text of every SEARCH_FIELDS field the resume has, for the field-scoped postings."""
+    texts = {}
+    for name, path in SEARCH_FIELDS.items():
+        text = normalize(flatten_json(field_value(doc, path)))
+        if text:
+            texts[name] = text
+    return texts
+
+def field_term(field: str, term: str) -> str:
+    return f"{field}:{term}"
+
+def split_field_term(term: str) -> Tuple[Optional[str], str]:
+    """``("skills", "python")`` for ``"skills:python"``; ``(None, term)`` when there is no known field prefix."""
+    field, sep, rest = term.partition(":")
+    if sep and field in SEARCH_FIELDS and rest:
+        return field, rest
+    return None, term
+
+def record_terms(record: dict) -> Set[str]:
+    """Every posting key a stored search record belongs to: its plain and its field-scoped terms."""
+    terms = set(record.get("text", "").split())
+    for name, text in record.get("field_text", {}).items():
+        terms.update(field_term(name, term) for term in text.split())
+    return terms
+
+def record_words(record: dict) -> Set[str]:
+    """The real words of a stored search record (its position keys), without merged bigrams or halves."""
+    return set(record.get("positions", {}))
+
+def document_positions(doc: dict) -> Tuple[Dict[str, List[int]], Dict[str, dict], Dict[str, List[List[int]]]]:
+    """Word → positions map for a resume, the position span and word count of each top-level
+    field, and the ``[start, end)`` position spans of every SEARCH_FIELDS field.
+
+    Each string value is tokenized separately and consecutive values are separated by a
+    one-position gap, so a phrase can never match across two fields that flatten_json
+    happens to put next to each other.
+    """
+    positions: Dict[str, List[int]] = {}
+    fields: Dict[str, dict] = {}
+    field_spans: Dict[str, List[List[int]]] = {}
+    position = 0
+    for name, value in _without_id(doc).items():
+        start, length = position, 0
+        for path, leaf in iter_leaves(value, (name,)):
+            leaf_start = position
+            for word in phrase_words(leaf):
+                positions.setdefault(word, []).append(position)
+                position += 1
+                length += 1
+            if position > leaf_start:
+                for field, field_path in SEARCH_FIELDS.items():
+                    if path[:len(field_path)] == field_path:
+                        spans = field_spans.setdefault(field, [])
+                        # Values that follow each other in the same field share one span
+                        if spans and spans[-1][1] + 1 == leaf_start:
+                            spans[-1][1] = position
+                        else:
+                            spans.append([leaf_start, position])
+            position += 1
+        if length:
+            fields[name] = {"start": start, "end": position, "length": length}
+    return positions, fields, field_spans
+
+def _field_lengths(record: dict) -> Dict[str, int]:
+    """Word count per field of a stored search record, as summed into the index stats."""
+    return {name: span["length"] for name, span in record.get("fields", {}).items()}
+
+def _in_spans(position: int, spans: List[List[int]]) -> bool:
+    return any(start <= position < end for start, end in spans)
+
+def _contains_sequence(positions: Dict[str, List[int]], words: List[str],
+                       spans: Optional[List[List[int]]] = None) -> bool:
+    """True when ``words`` occur at consecutive positions, starting inside ``spans`` if given."""
+    following = [set(positions.get(word, ())) for word in words[1:]]
+    return any(
+        all(start + offset in later for offset, later in enumerate(following, start=1))
+        for start in positions.get(words[0], ())
+        if spans is None or _in_spans(start, spans)
+    )
+
+
+# Bitmaps
+#
+# In memory a posting list is a plain Python int with bit n set for doc ordinal n, so
+# AND/OR/NOT are single C-level &, | and & ~ operations over the whole collection.
+
+def _pack_uint16(values) -> bytes:
+    packed = array("H", values)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+def _unpack_uint16(data: bytes) -> array:
+    values = array("H")
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+def bitmap_from_ordinals(ordinals: Iterable[int]) -> int:
+    """Build an in-memory bitmap from doc ordinals."""
+    ordinals = list(ordinals)
+    if not ordinals:
+        return 0
+    data = bytearray(max(ordinals) // 8 + 1)
+    for ordinal in ordinals:
+        data[ordinal >> 3] |= 1 << (ordinal & 7)
+    return int.from_bytes(data, "little")
+
+def bitmap_ordinals(bits: int) -> Iterator[int]:
+    """Yield the doc ordinals set in a bitmap, in ascending order."""
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    for byte_index, byte in enumerate(data):
+        while byte:
+            low = byte & -byte
+            yield byte_index * 8 + low.bit_length() - 1
+            byte ^= low
+
+def bitmap_count(bits: int) -> int:
+    """Number of doc ordinals set in a bitmap."""
+    return bin(bits).count("1")
+
+def encode_bitmap(bits: int) -> List[dict]:
+    """Serialize a bitmap into roaring-style containers for storage."""
+    containers = []
+    key = 0
+    mask = (1 << CONTAINER_BITS) - 1
+    while bits:
+        chunk = bits & mask
+        if chunk:
+            if bitmap_count(chunk) <= ARRAY_CONTAINER_MAX:
+                containers.append({"key": key, "array": _pack_uint16(bitmap_ordinals(chunk))})
+            else:
+                containers.append({"key": key, "bitmap": chunk.to_bytes(CONTAINER_BITS // 8, "little")})
+        bits >>= CONTAINER_BITS
+        key += 1
+    return containers
+
+def decode_bitmap(containers: List[dict]) -> int:
+    """Inverse of encode_bitmap."""
+    bits = 0
+    for container in containers:
+        if "bitmap" in container:
+            chunk = int.from_bytes(container["bitmap"], "little")
+        else:
+            chunk = bitmap_from_ordinals(_unpack_uint16(container["array"]))
+        bits |= chunk << (container["key"] * CONTAINER_BITS)
+    return bits
+
+def decode_posting(entry: dict, field: str = "bitmap") -> int:
+    """Bitmap of a stored posting: its packed containers with the incremental overlay applied."""
+    bits = decode_bitmap(entry.get(field, []))
+    if entry.get("added"):
+        bits |= bitmap_from_ordinals(entry["added"])
+    if entry.get("removed"):
+        bits &= ~bitmap_from_ordinals(entry["removed"])
+    return bits
+
+
+
+def _trigrams(term: str) -> Set[str]:
+    padded = f"$${term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance (an adjacent transposition counts as one edit).
+
+    Stops early and returns ``limit + 1`` once the distance is known to exceed ``limit``.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+class TermDictionary:
+    """Trigram index over the index vocabulary, for typo-tolerant term expansion.
+
+    A term within ``d`` edits of a query term shares all but at most ``4 * d`` of its padded
+    trigrams, so only terms passing that count (and the length bound) reach the edit-distance
+    check. Suggestions are ordered by distance, then by document frequency. Terms whose
+    frequency drops to zero stay indexed but are never suggested.
+    """
+
+    def __init__(self, frequencies: Dict[str, int]):
+        self.terms: List[str] = []
+        self.frequencies: Dict[str, int] = {}
+        self.grams: Dict[str, array] = {}
+        self.update(frequencies)
+
+    def update(self, frequencies: Dict[str, int]):
+        """Add new terms and overwrite the frequencies of known ones."""
+        for term, frequency in frequencies.items():
+            if term not in self.frequencies:
+                term_id = len(self.terms)
+                self.terms.append(term)
+                for gram in _trigrams(term):
+                    self.grams.setdefault(gram, array("I")).append(term_id)
+            self.frequencies[term] = frequency
+
+    def suggest(self, term: str, limit: int = FUZZY_MAX_EXPANSIONS) -> List[str]:
+        if len(term) < FUZZY_MIN_LENGTH:
+            return []
+        max_distance = 2 if len(term) >= FUZZY_LONG_LENGTH else 1
+        grams = _trigrams(term)
+        min_shared = max(1, len(grams) - 4 * max_distance)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.grams.get(gram, ()))
+
+        scored = []
+        for term_id, count in shared.items():
+            candidate = self.terms[term_id]
+            if count < min_shared or candidate == term or abs(len(candidate) - len(term)) > max_distance:
+                continue
+            if self.frequencies[candidate] <= 0:
+                continue
+            distance = edit_distance(term, candidate, max_distance)
+            if distance <= max_distance:
+                scored.append((distance, -self.frequencies[candidate], candidate))
+        return [candidate for _, _, candidate in sorted(scored)[:limit]]
+
+# Term dictionaries shared by every SearchIndex in the process:
+# word collection → (generation, collection version, newest word stamp read, dictionary)
+_term_dictionaries: Dict[str, Tuple[int, int, int, TermDictionary]] = {}
+_term_dictionaries_lock = threading.Lock()
+
+
+class SearchIndex:
+    """Inverted index (term → bitmap of resume ordinals) persisted next to the resume collection.
+
+    Every indexed resume gets an integer ordinal (dense after a rebuild; later inserts take
+    the next free one), stored with its normalized text and its word positions in
+    ``<collection>_search_docs`` (both are written once at ingest time and stamped with
+    NORMALIZER_VERSION). Postings live in ``<collection>_search_index`` as
+    ``{"_id": term, "bitmap": [containers], "added": [...], "removed": [...], "df": n}`` and the
+    build state, including the bitmap of all indexed ordinals, lives in ``<collection>_search_meta``.
+    Field-scoped postings (``"skills:python"``) have the same shape and live in
+    ``<collection>_search_fields``. The real words (no merged bigrams or halves) are kept in
+    ``<collection>_search_words`` as ``{"_id": word, "df": n, "stamp": collection_version}``
+    for typo expansion. Writes keep the index current incrementally (see
+    ``index_document``). Lookups are memoized per instance, so create one
+    ``SearchIndex`` per query.
+    """
+
+    META_ID = "meta"
+
+    def __init__(self, db, collection_name: str):
+        self.resumes = db[collection_name]
+        self.postings = db[f"{collection_name}_search_index"]
+        self.field_postings = db[f"{collection_name}_search_fields"]
+        self.meta = db[f"{collection_name}_search_meta"]
+        self.search_docs = db[f"{collection_name}_search_docs"]
+        self.words = db[f"{collection_name}_search_words"]
+        self._term_cache: Dict[str, int] = {}
+        self._substring_cache: Dict[str, int] = {}
+        self._phrase_cache: Dict[str, int] = {}
+        self._containing_cache: Dict[str, List[str]] = {}
+        self._universe: Optional[int] = None
+
+    def _clear_caches(self):
+        self._term_cache.clear()
+        self._substring_cache.clear()
+        self._phrase_cache.clear()
+        self._containing_cache.clear()
+        self._universe = None
+
+    def is_ready(self) -> bool:
+        """True when a complete, current-version index exists and no write has invalidated it."""
+        meta = self.meta.find_one({"_id": self.META_ID}, {"universe": 0})
+        return (
+            bool(meta)
+            and meta.get("version") == INDEX_VERSION
+            and meta.get("normalizer_version") == NORMALIZER_VERSION
+            and not meta.get("stale", True)
+        )
+
+    def mark_stale(self):
+        """Flag the index as out of date after a write to the resume collection.
+
+        Also bumps the collection version, which invalidates every cached result set.
+        """
+        self.meta.update_one(
+            {"_id": self.META_ID},
+            {"$set": {"stale": True}, "$inc": {"collection_version": 1}},
+            upsert=True,
+        )
+        self._clear_caches()
+
+    def store_document(self, doc: dict) -> dict:
+        """Normalize a resume once and store its search text, word positions and field spans.
+
+        Returns the stored fields. Writes from ResumeDBManager go through ``index_document``,
+        which also updates the postings.
+        """
+        record = self._search_record(doc)
+        self.search_docs.update_one({"_id": doc["_id"]}, {"$set": record, "$inc": {"revision": 1}}, upsert=True)
+        return record
+
+    @staticmethod
+    def _search_record(doc: dict) -> dict:
+        positions, fields, field_spans = document_positions(doc)
+        return {
+            "text": search_text(doc),
+            "field_text": field_texts(doc),
+            "positions": positions,
+            "fields": fields,
+            "field_spans": field_spans,
+            "normalizer_version": NORMALIZER_VERSION,
+        }
+
+    def index_document(self, doc: dict):
+        """Store a new or updated resume and fold it into the index in place.
+
+        Only the postings of terms the resume gained or lost are touched; the delta comes from
+        the token set stored for its previous version. When there is no current index, or a
+        concurrent write to the same resume got in the way, the index is marked stale and
+        rebuilt on next search.
+        """
+        old = self.search_docs.find_one(
+            {"_id": doc["_id"]},
+            {"text": 1, "field_text": 1, "fields": 1, "positions": 1, "ordinal": 1, "normalizer_version": 1,
+             "revision": 1},
+        )
+        new = self._search_record(doc)
+        # Compare-and-swap on the revision read above, so two writers never apply deltas
+        # computed from the same previous version
+        stored = self.search_docs.update_one(
+            {"_id": doc["_id"], "revision": old.get("revision")} if old else {"_id": doc["_id"]},
+            {"$set": new, "$inc": {"revision": 1}},
+            upsert=old is None,
+        )
+        if not (stored.matched_count or stored.upserted_id is not None):
+            self.store_document(doc)
+            self.mark_stale()
+            return
+        if not self.is_ready():
+            self.mark_stale()
+            return
+
+        new_terms = record_terms(new)
+        if old is None:
+            ordinal = self._next_ordinal()
+            self.search_docs.update_one({"_id": doc["_id"]}, {"$set": {"ordinal": ordinal}})
+            applied = self._apply_delta(ordinal, new_terms, set(), 1, _field_lengths(new), record_words(new), set())
+        elif "ordinal" in old and old.get("normalizer_version") == NORMALIZER_VERSION:
+            old_terms = record_terms(old)
+            field_delta = _field_lengths(new)
+            for name, length in _field_lengths(old).items():
+                field_delta[name] = field_delta.get(name, 0) - length
+            old_words, new_words = record_words(old), record_words(new)
+            applied = self._apply_delta(old["ordinal"], new_terms - old_terms, old_terms - new_terms, 0, field_delta,
+                                        new_words - old_words, old_words - new_words)
+        else:
+            applied = False
+        if not applied:
+            self.mark_stale()
+
+    def unindex_document(self, doc_id):
+        """Drop a deleted resume's search text and clear its bit from every posting it was in."""
+        old = self.search_docs.find_one_and_delete(
+            {"_id": doc_id}, {"text": 1, "field_text": 1, "fields": 1, "positions": 1, "ordinal": 1}
+        )
+        if old is None or "ordinal" not in old or not self.is_ready():
+            self.mark_stale()
+            return
+        removed_lengths = {name: -length for name, length in _field_lengths(old).items()}
+        if not self._apply_delta(old["ordinal"], set(), record_terms(old), -1, removed_lengths, set(), record_words(old)):
+            self.mark_stale()
+
+    def clear(self):
+        """Drop the stored text and postings of every resume, leaving a current, empty index."""
+        self.search_docs.delete_many({})
+        self.postings.delete_many({})
+        self.field_postings.delete_many({})
+        self.words.delete_many({})
+        self.words.create_index("stamp")
+        self.meta.update_one(
+            {"_id": self.META_ID},
+            {
+                "$set": {
+                    "version": INDEX_VERSION,
+                    "normalizer_version": NORMALIZER_VERSION,
+                    "doc_count": 0,
+                    "field_lengths": {},
+                    "universe": [],
+                    "added": [],
+                    "removed": [],
+                    "next_ordinal": 0,
+                    "stale": False,
+                },
+                "$inc": {"generation": 1, "collection_version": 1},
+            },
+            upsert=True,
+        )
+        self._clear_caches()
+
+    def _postings_for(self, term: str):
+        """Collection holding a term's postings: field-scoped terms are kept apart from plain ones."""
+        return self.field_postings if ":" in term else self.postings
+
+    def _next_ordinal(self) -> int:
+        meta = self.meta.find_one_and_update(
+            {"_id": self.META_ID},
+            {"$inc": {"next_ordinal": 1}},
+            projection={"next_ordinal": 1},
+            return_document=ReturnDocument.BEFORE,
+        )
+        return meta["next_ordinal"]
+
+    def _apply_delta(self, ordinal: int, added: Set[str], removed: Set[str], doc_delta: int,
+                     field_delta: Dict[str, int], words_added: Set[str], words_removed: Set[str]) -> bool:
+        """Set ``ordinal`` in the postings of ``added``, clear it from ``removed`` and adjust the stats.
+
+        Nothing is read back: each posting gets one ``$addToSet``/``$pull`` on its overlay and a
+        ``$inc`` of its document frequency, all sent as unordered bulk writes. Overlays that grow
+        past OVERLAY_COMPACT_SIZE are then folded into the packed containers. The word vocabulary
+        gets the same ``$inc`` for ``words_added``/``words_removed``, stamped with the new
+        collection version so term dictionaries can pick up just the changed words. Returns False
+        when a posting that should exist is missing or the index went stale meanwhile. Also bumps
+        the collection version.
+        """
+        ops = {self.postings.name: [], self.field_postings.name: []}
+        for term in added:
+            ops[self._postings_for(term).name].append(UpdateOne(
+                {"_id": term},
+                {"$addToSet": {"added": ordinal}, "$pull": {"removed": ordinal}, "$inc": {"df": 1}},
+                upsert=True,
+            ))
+        for term in removed:
+            ops[self._postings_for(term).name].append(UpdateOne(
+                {"_id": term},
+                {"$addToSet": {"removed": ordinal}, "$pull": {"added": ordinal}, "$inc": {"df": -1}},
+            ))
+        for collection in (self.postings, self.field_postings):
+            collection_ops = ops[collection.name]
+            for start in range(0, len(collection_ops), BUILD_BATCH_SIZE):
+                batch = collection_ops[start:start + BUILD_BATCH_SIZE]
+                try:
+                    result = collection.bulk_write(batch, ordered=False)
+                except BulkWriteError:
+                    return False
+                if result.matched_count + result.upserted_count != len(batch):
+                    return False
+
+        if doc_delta >= 0:
+            overlay = {"$addToSet": {"added": ordinal}, "$pull": {"removed": ordinal}}
+        else:
+            overlay = {"$addToSet": {"removed": ordinal}, "$pull": {"added": ordinal}}
+        increments = {f"field_lengths.{name}": length for name, length in field_delta.items() if length}
+        increments.update({"doc_count": doc_delta, "collection_version": 1})
+        meta = self.meta.find_one_and_update(
+            {"_id": self.META_ID, "stale": False},
+            {**overlay, "$inc": increments},
+            projection={"collection_version": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        self._clear_caches()
+        if meta is None:
+            return False
+
+        stamp = meta["collection_version"]
+        word_ops = [
+            UpdateOne({"_id": word}, {"$inc": {"df": 1}, "$max": {"stamp": stamp}}, upsert=True)
+            for word in words_added
+        ] + [
+            UpdateOne({"_id": word}, {"$inc": {"df": -1}, "$max": {"stamp": stamp}})
+            for word in words_removed
+        ]
+        for start in range(0, len(word_ops), BUILD_BATCH_SIZE):
+            self.words.bulk_write(word_ops[start:start + BUILD_BATCH_SIZE], ordered=False)
+
+        changed = added | removed
+        self._compact(self.postings, [term for term in changed if ":" not in term])
+        self._compact(self.field_postings, [term for term in changed if ":" in term])
+        self._compact(self.meta, [self.META_ID], field="universe")
+        return True
+
+    @staticmethod
+    def _compact(collection, ids: List, field: str = "bitmap"):
+        """Fold the overlays of ``ids`` that outgrew OVERLAY_COMPACT_SIZE into packed containers."""
+        oversized = {"$or": [
+            {f"added.{OVERLAY_COMPACT_SIZE}": {"$exists": True}},
+            {f"removed.{OVERLAY_COMPACT_SIZE}": {"$exists": True}},
+        ]}
+        for start in range(0, len(ids), BUILD_BATCH_SIZE):
+            query = {"_id": {"$in": ids[start:start + BUILD_BATCH_SIZE]}, **oversized}
+            for entry in collection.find(query, {field: 1, "added": 1, "removed": 1}):
+                # Filtered on the overlay just read, so a concurrent write is never folded away
+                expected = {
+                    name: entry[name] if name in entry else {"$exists": False}
+                    for name in ("added", "removed")
+                }
+                collection.update_one(
+                    {"_id": entry["_id"], **expected},
+                    {"$set": {field: encode_bitmap(decode_posting(entry, field)), "added": [], "removed": []}},
+                )
+
+    def search_text_in_sync(self) -> bool:
+        """Cheap check that the stored search text needs no reconciling.
+
+        The last build must have used the current normalize() version, and the collection must
+        hold as many resumes as there are stored search records. Resumes written around
+        ResumeDBManager usually break the count. Only collection metadata is read.
+        """
+        meta = self.meta.find_one({"_id": self.META_ID}, {"normalizer_version": 1})
+        return (
+            bool(meta)
+            and meta.get("normalizer_version") == NORMALIZER_VERSION
+            and self.resumes.estimated_document_count() == self.search_docs.estimated_document_count()
+        )
+
+    def refresh_search_text(self) -> int:
+        """Re-normalize resumes whose stored text is missing or from an older normalize() version.
+
+        Also drops text left behind by deleted resumes. Marks the index stale when anything
+        changed and returns the number of resumes that were re-normalized. This reads every id in
+        both collections, so it runs as part of ``build()`` rather than on every search.
+        """
+        # Stream the ids instead of distinct(), whose result must fit in one 16 MB document
+        resume_ids = {doc["_id"] for doc in self.resumes.find({}, {"_id": 1}).batch_size(BUILD_BATCH_SIZE)}
+        stored_ids, current_ids = set(), set()
+        for entry in self.search_docs.find({}, {"normalizer_version": 1}).batch_size(BUILD_BATCH_SIZE):
+            stored_ids.add(entry["_id"])
+            if entry.get("normalizer_version") == NORMALIZER_VERSION:
+                current_ids.add(entry["_id"])
+        orphan_ids = stored_ids - resume_ids
+        stale_ids = list(resume_ids - current_ids)
+
+        if orphan_ids:
+            self.search_docs.delete_many({"_id": {"$in": list(orphan_ids)}})
+        for start in range(0, len(stale_ids), BUILD_BATCH_SIZE):
+            batch = stale_ids[start:start + BUILD_BATCH_SIZE]
+            for doc in self.resumes.find({"_id": {"$in": batch}}):
+                self.store_document(doc)
+
+        if stale_ids or orphan_ids:
+            print(f"🔄 Re-normalized {len(stale_ids)} resumes, dropped {len(orphan_ids)} orphaned entries.")
+            self.mark_stale()
+        return len(stale_ids)
+
+    def iter_search_text(self, doc_ids: Optional[Iterable] = None):
+        """Yield ``(resume_id, normalized_text)`` pairs, reading only the stored text field."""
+        for batch in self.iter_search_text_batches(doc_ids):
+            yield from batch
+
+    def iter_search_text_batches(self, doc_ids: Optional[Iterable] = None, batch_size: int = SCAN_BATCH_SIZE):
+        """Yield lists of at most ``batch_size`` ``(resume_id, normalized_text)`` pairs.
+
+        Streams a batched cursor projected to the stored text, so a full scan holds one batch in
+        memory instead of the whole collection.
+        """
+        query = {"_id": {"$in": list(doc_ids)}} if doc_ids is not None else {}
+        batch = []
+        for entry in self.search_docs.find(query, {"text": 1}).batch_size(batch_size):
+            batch.append((entry["_id"], entry.get("text", "")))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def iter_records(self, bits: int, projection: dict):
+        """Yield the stored search records for every ordinal set in ``bits``."""
+        ordinals = list(bitmap_ordinals(bits))
+        for start in range(0, len(ordinals), BUILD_BATCH_SIZE):
+            batch = ordinals[start:start + BUILD_BATCH_SIZE]
+            yield from self.search_docs.find({"ordinal": {"$in": batch}}, projection)
+
+    def build(self, progress_callback: Optional[Callable[[int, int], None]] = None) -> int:
+        """Rebuild the whole index from the stored search text. Returns the number of indexed resumes."""
+        self.refresh_search_text()
+        self.search_docs.create_index("ordinal")
+        total = self.search_docs.estimated_document_count()
+        postings: Dict[str, List[int]] = {}
+        field_lengths: Dict[str, int] = {}
+        words: Dict[str, int] = {}
+        ordinal_updates = []
+        indexed = 0
+
+        # Ordinals are handed out densely in scan order, so every posting list comes out sorted
+        for entry in self.search_docs.find({}, {"text": 1, "field_text": 1, "fields": 1, "positions": 1}):
+            ordinal = indexed
+            for term in record_terms(entry):
+                postings.setdefault(term, []).append(ordinal)
+            for word in record_words(entry):
+                words[word] = words.get(word, 0) + 1
+            for name, span in entry.get("fields", {}).items():
+                field_lengths[name] = field_lengths.get(name, 0) + span["length"]
+            ordinal_updates.append(UpdateOne({"_id": entry["_id"]}, {"$set": {"ordinal": ordinal}}))
+            if len(ordinal_updates) >= BUILD_BATCH_SIZE:
+                self.search_docs.bulk_write(ordinal_updates, ordered=False)
+                ordinal_updates = []
+            indexed += 1
+            if progress_callback:
+                progress_callback(indexed, max(total, indexed))
+        if ordinal_updates:
+            self.search_docs.bulk_write(ordinal_updates, ordered=False)
+
+        self.postings.delete_many({})
+        self.field_postings.delete_many({})
+        batches = {self.postings.name: [], self.field_postings.name: []}
+        for term, ordinals in postings.items():
+            collection = self._postings_for(term)
+            batch = batches[collection.name]
+            batch.append({"_id": term, "bitmap": encode_bitmap(bitmap_from_ordinals(ordinals)), "df": len(ordinals)})
+            if len(batch) >= BUILD_BATCH_SIZE:
+                collection.insert_many(batch, ordered=False)
+                batch.clear()
+        for collection in (self.postings, self.field_postings):
+            if batches[collection.name]:
+                collection.insert_many(batches[collection.name], ordered=False)
+
+        self.words.delete_many({})
+        self.words.create_index("stamp")
+        word_entries = [{"_id": word, "df": df, "stamp": 0} for word, df in words.items()]
+        for start in range(0, len(word_entries), BUILD_BATCH_SIZE):
+            self.words.insert_many(word_entries[start:start + BUILD_BATCH_SIZE], ordered=False)
+
+        # Update in place so a concurrent mark_stale() never loses a collection_version bump
+        self.meta.update_one(
+            {"_id": self.META_ID},
+            {
+                "$set": {
+                    "version": INDEX_VERSION,
+                    "normalizer_version": NORMALIZER_VERSION,
+                    "doc_count": indexed,
+                    "field_lengths": field_lengths,
+                    "universe": encode_bitmap((1 << indexed) - 1),
+                    "added": [],
+                    "removed": [],
+                    "next_ordinal": indexed,
+                    "stale": False,
+                },
+                "$inc": {"generation": 1},
+            },
+            upsert=True,
+        )
+        self._clear_caches()
+        print(f"📇 Indexed {indexed} resumes ({len(postings)} terms).")
+        return indexed
+
+    def collection_version(self) -> int:
+        """Counter bumped by every write to the resume collection (see ``mark_stale``)."""
+        meta = self.meta.find_one({"_id": self.META_ID}, {"collection_version": 1}) or {}
+        return meta.get("collection_version", 0)
+
+    def stats(self) -> dict:
+        """Corpus statistics for ranking: indexed resume count and total word count per field."""
+        meta = self.meta.find_one({"_id": self.META_ID}, {"doc_count": 1, "field_lengths": 1}) or {}
+        return {"doc_count": meta.get("doc_count", 0), "field_lengths": meta.get("field_lengths", {})}
+
+    def universe(self) -> int:
+        """Bitmap of every indexed resume; the set that NOT subtracts from."""
+        if self._universe is None:
+            meta = self.meta.find_one({"_id": self.META_ID}, {"universe": 1, "added": 1, "removed": 1})
+            self._universe = decode_posting(meta, "universe") if meta else 0
+        return self._universe
+
+    def resolve(self, bits: int) -> Set:
+        """Map a bitmap of ordinals back to resume ids, reading nothing but the ids."""
+        return {entry["_id"] for entry in self.iter_records(bits, {"_id": 1})}
+
+    def lookup(self, term: str) -> int:
+        """Posting bitmap for an exact normalized term."""
+        if term not in self._term_cache:
+            entry = self._postings_for(term).find_one({"_id": term})
+            self._term_cache[term] = decode_posting(entry) if entry else 0
+        return self._term_cache[term]
+
+    def lookup_many(self, terms: Iterable[str]) -> Dict[str, int]:
+        """Fetch several posting bitmaps in one round trip."""
+        terms = list(terms)
+        missing = [t for t in set(terms) if t not in self._term_cache]
+        if missing:
+            for t in missing:
+                self._term_cache[t] = 0
+            for collection in (self.postings, self.field_postings):
+                wanted = [t for t in missing if self._postings_for(t) is collection]
+                if wanted:
+                    for entry in collection.find({"_id": {"$in": wanted}}):
+                        self._term_cache[entry["_id"]] = decode_posting(entry)
+        return {t: self._term_cache[t] for t in terms}
+
+    def term_dictionary(self) -> "TermDictionary":
+        """Trigram dictionary of the real indexed words, shared process-wide.
+
+        Loaded once per index generation. After an incremental write only the words stamped
+        since the last read are fetched and added; a word whose write was still in flight is
+        picked up after the next one, since the newest stamp is always read again.
+        """
+        meta = self.meta.find_one({"_id": self.META_ID}, {"generation": 1, "collection_version": 1}) or {}
+        generation, version = meta.get("generation", 0), meta.get("collection_version", 0)
+        with _term_dictionaries_lock:
+            cached = _term_dictionaries.get(self.words.full_name)
+            if cached and cached[0] == generation:
+                _, cached_version, newest_stamp, dictionary = cached
+                if cached_version != version:
+                    changed = {}
+                    # build() stamps its words 0, incremental writes stamp them 1 and up
+                    query = {"stamp": {"$gte": max(newest_stamp, 1)}}
+                    for entry in self.words.find(query, {"df": 1, "stamp": 1}):
+                        changed[entry["_id"]] = entry.get("df", 0)
+                        newest_stamp = max(newest_stamp, entry.get("stamp", 0))
+                    dictionary.update(changed)
+                    _term_dictionaries[self.words.full_name] = (generation, version, newest_stamp, dictionary)
+                return dictionary
+
+        frequencies, newest_stamp = {}, 0
+        for entry in self.words.find({"df": {"$gt": 0}}, {"df": 1, "stamp": 1}):
+            frequencies[entry["_id"]] = entry["df"]
+            newest_stamp = max(newest_stamp, entry.get("stamp", 0))
+        dictionary = TermDictionary(frequencies)
+        with _term_dictionaries_lock:
+            _term_dictionaries[self.words.full_name] = (generation, version, newest_stamp, dictionary)
+        return dictionary
+
+    def suggest(self, term: str) -> List[str]:
+        """Indexed words within a small edit distance of ``term`` (which itself has no postings)."""
+        return self.term_dictionary().suggest(term)
+
+    def lookup_substring(self, term: str) -> int:
+        """Union of the posting bitmaps of every indexed term containing ``term``."""
+        if term not in self._substring_cache:
+            bits = 0
+            # Field-scoped postings live in their own collection, so only plain terms are matched
+            for entry in self.postings.find({"_id": {"$regex": re.escape(term)}}):
+                bits |= decode_posting(entry)
+            self._substring_cache[term] = bits
+        return self._substring_cache[term]
+
+    def known_words(self, words: Iterable[str]) -> Set[str]:
+        """The ones among ``words`` that occur as a real word in some indexed resume."""
+        query = {"_id": {"$in": list(set(words))}, "df": {"$gt": 0}}
+        return {entry["_id"] for entry in self.words.find(query, {"_id": 1})}
+
+    def words_containing(self, term: str) -> List[str]:
+        """Every real indexed word containing ``term``, read from the word vocabulary."""
+        if term not in self._containing_cache:
+            query = {"_id": {"$regex": re.escape(term)}, "df": {"$gt": 0}}
+            self._containing_cache[term] = [entry["_id"] for entry in self.words.find(query, {"_id": 1})]
+        return self._containing_cache[term]
+
+    def lookup_field(self, field: str, term: str) -> int:
+        """Resumes whose ``field`` contains ``term``, read from that field's postings only.
+
+        A multi-word term is narrowed to resumes whose field holds each adjacent pair's merged
+        bigram, then confirmed like ``lookup_phrase``, within the field's position spans.
+        """
+        words = phrase_words(term)
+        if not words:
+            return 0
+        if len(words) == 1:
+            return self.lookup(field_term(field, words[0]))
+
+        key = field_term(field, " ".join(words))
+        if key not in self._phrase_cache:
+            bigrams = [field_term(field, first + second) for first, second in zip(words, words[1:])]
+            self._phrase_cache[key] = self._confirm_sequence(self._intersect(bigrams), words, field)
+        return self._phrase_cache[key]
+
+    def lookup_phrase(self, phrase: str) -> int:
+        """Resumes where the words of ``phrase`` appear consecutively within a single field.
+
+        Candidates come from intersecting the postings of the merged bigrams normalize()
+        injects for each adjacent word pair; the stored word positions of each candidate
+        then confirm true adjacency.
+        """
+        words = phrase_words(phrase)
+        if not words:
+            return 0
+        if len(words) == 1:
+            return self.lookup(words[0])
+
+        key = " ".join(words)
+        if key not in self._phrase_cache:
+            bigrams = [words[i] + words[i+1] for i in range(len(words) - 1)]
+            self._phrase_cache[key] = self._confirm_sequence(self._intersect(bigrams), words)
+        return self._phrase_cache[key]
+
+    def _intersect(self, terms: List[str]) -> int:
+        postings = self.lookup_many(terms)
+        bits = postings[terms[0]]
+        for term in terms[1:]:
+            bits &= postings[term]
+        return bits
+
+    def _confirm_sequence(self, candidates: int, words: List[str], field: Optional[str] = None) -> int:
+        """The candidates whose stored positions hold ``words`` consecutively (inside ``field`` if given)."""
+        projection = {f"positions.{word}": 1 for word in set(words)}
+        projection["ordinal"] = 1
+        if field:
+            projection[f"field_spans.{field}"] = 1
+        matched = []
+        ordinals = list(bitmap_ordinals(candidates))
+        for start in range(0, len(ordinals), BUILD_BATCH_SIZE):
+            batch = ordinals[start:start + BUILD_BATCH_SIZE]
+            for entry in self.search_docs.find({"ordinal": {"$in": batch}}, projection):
+                spans = entry.get("field_spans", {}).get(field, []) if field else None
+                if _contains_sequence(entry.get("positions", {}), words, spans):
+                    matched.append(entry["ordinal"])
+        return bitmap_from_ordinals(matched)
+
+
+class BM25Scorer:
+    """BM25F relevance over the word positions stored for each resume.
+
+    Term frequencies are counted per top-level field from the stored positions, weighted by
+    FIELD_WEIGHTS and length-normalized against the corpus average for that field, so
+    ranking a match set is a single arithmetic pass over the matched records. A field-scoped
+    term only counts occurrences inside that field's stored spans (for ``company:``, the
+    company values of the experience entries). Records are read with ``projection()``, which
+    fetches only the positions of words the query can count.
+    """
+
+    def __init__(self, stats: dict, document_frequencies: Dict[str, int]):
+        doc_count = max(stats.get("doc_count", 0), 1)
+        self.avg_field_length = {
+            name: total / doc_count for name, total in stats.get("field_lengths", {}).items()
+        }
+        self.idf = {
+            term: math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            for term, df in document_frequencies.items()
+        }
+
+    def projection(self, index: "SearchIndex") -> dict:
+        """Fields of the stored search records needed to score this query.
+
+        Reads the field spans plus the positions of just the words ``term_positions`` can look
+        at: each term's own words, the halves of a merged bigram and, for a term long enough to
+        match inside stored words that has no postings of its own, the real words containing it.
+        """
+        projection = {"fields": 1, "field_spans": 1}
+        for term in self.idf:
+            words = phrase_words(split_field_term(term)[1])
+            if len(words) == 1:
+                word = words[0]
+                words.extend(part for split in range(1, len(word)) for part in (word[:split], word[split:]))
+                if len(word) > 4:
+                    # Exact and merged-bigram hits never fall back to stored words containing the term
+                    known = index.known_words(words)
+                    if word not in known and not any(
+                        word[:split] in known and word[split:] in known for split in range(1, len(word))
+                    ):
+                        words.extend(index.words_containing(word))
+            projection.update({f"positions.{word}": 1 for word in words})
+        return projection
+
+    @staticmethod
+    def term_positions(positions: Dict[str, List[int]], term: str) -> List[int]:
+        """Positions where a query term occurs, mirroring how the index matches it."""
+        words = phrase_words(term)
+        if not words:
+            return []
+        if len(words) > 1:
+            following = [set(positions.get(word, ())) for word in words[1:]]
+            return [
+                start for start in positions.get(words[0], ())
+                if all(start + offset in later for offset, later in enumerate(following, start=1))
+            ]
+        word = words[0]
+        hits = list(positions.get(word, ()))
+        # Merged bigrams ("machinelearning") are also two adjacent stored words
+        for split in range(1, len(word)):
+            head, tail = word[:split], word[split:]
+            if head in positions and tail in positions:
+                tail_positions = set(positions[tail])
+                hits.extend(p for p in positions[head] if p + 1 in tail_positions)
+        if hits or len(word) <= 4:
+            return hits
+        # Longer terms also match inside stored words ("kuber" → "kubernetes")
+        return [p for stored, found in positions.items() if word in stored for p in found]
+
+    def score(self, record: dict) -> float:
+        positions = record.get("positions", {})
+        fields = record.get("fields", {})
+        field_spans = record.get("field_spans", {})
+        ordered = sorted((span["start"], name) for name, span in fields.items())
+        starts = [start for start, _ in ordered]
+
+        total = 0.0
+        for term, idf in self.idf.items():
+            # A field-scoped term only counts occurrences inside its own field's spans
+            field, word = split_field_term(term)
+            scope = field_spans.get(field, []) if field else None
+            field_tf: Dict[str, int] = {}
+            for position in self.term_positions(positions, word):
+                if scope is not None and not _in_spans(position, scope):
+                    continue
+                slot = bisect_right(starts, position) - 1
+                if slot >= 0:
+                    name = ordered[slot][1]
+                    field_tf[name] = field_tf.get(name, 0) + 1
+            if not field_tf:
+                continue
+
+            weighted_tf = 0.0
+            for name, tf in field_tf.items():
+                avg_length = self.avg_field_length.get(name) or fields[name]["length"]
+                norm = 1 - BM25_B + BM25_B * fields[name]["length"] / avg_length
+                weighted_tf += FIELD_WEIGHTS.get(name, 1.0) * tf / norm
+            total += idf * weighted_tf / (BM25_K1 + weighted_tf)
+        return total
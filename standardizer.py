@@ -3,15 +3,16 @@ import json
 from pathlib import Path
 import httpx
 import asyncio
-import streamlit as st  # Added for secrets access
 import re
+from azure_clients import azure_settings
 
 class ResumeStandardizer:
     def __init__(self):
-        self.api_key = st.secrets["azure_openai"]["api_key"]
-        self.endpoint = st.secrets["azure_openai"]["endpoint"]
-        self.deployment = st.secrets["azure_openai"]["deployment"]
-        self.api_version = st.secrets["azure_openai"].get("api_version", "2024-08-01-preview")
+        settings = azure_settings()
+        self.api_key = settings["api_key"]
+        self.endpoint = settings["endpoint"]
+        self.deployment = settings["deployment"]
+        self.api_version = settings["api_version"]
 
         if not self.api_key or not self.endpoint or not self.deployment:
             raise ValueError("❌ Missing Azure OpenAI secrets in secrets.toml")
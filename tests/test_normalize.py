@@ -0,0 +1,136 @@
+"""normalize() must produce exactly what the regex-chain implementation it replaced did.
+
+``reference_normalize`` is that implementation, kept verbatim as the oracle.
+"""
+import random
+import re
+
+import pytest
+
+from search_index import normalize, phrase_words
+
+
+def reference_normalize(text: str) -> str:
+    # 1) Split CamelCase: "HuggingFace" → "Hugging Face"
+    text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)
+
+    # 2) Lowercase & basic cleanup
+    text = text.lower()
+    text = re.sub(r'(?<![\w@])\.net(?![\w.])', ' dotnet ', text)
+    text = re.sub(r'\S+@\S+', '', text)
+    text = re.sub(r'https?://\S+|www\.\S+', '', text)
+
+    # 3) Capture quoted phrases in the _source text_ and append the no-space form
+    quoted_phrases = re.findall(r'"([^"]+)"', text)
+    for phrase in quoted_phrases:
+        text += " " + phrase.replace(" ", "")
+
+    # 4) Strip quotation marks, remove symbols
+    text = text.replace('"', '')
+    text = re.sub(r'[^\w\s]', ' ', text)
+
+    # 5) Tokenize & inject bigrams + halves
+    words = text.split()
+    # 5a) adjacent-word bigrams
+    for i in range(len(words) - 1):
+        text += " " + words[i] + words[i+1]
+    # 5b) for long merged tokens, also inject a halved split
+    for tok in words:
+        if len(tok) > 8:
+            mid = len(tok) // 2
+            text += f" {tok[:mid]} {tok[mid:]}"
+
+    # 6) Normalize whitespace and ensure single spaces
+    text = re.sub(r'\s+', ' ', text).strip()
+
+    # 7) Remove duplicate words
+    words = text.split()
+    unique_words = []
+    seen_words = set()
+    for word in words:
+        if word not in seen_words:
+            seen_words.add(word)
+            unique_words.append(word)
+
+    return ' '.join(unique_words)
+
+
+def reference_phrase_words(text: str):
+    text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text).lower()
+    text = re.sub(r'(?<![\w@])\.net(?![\w.])', ' dotnet ', text)
+    text = re.sub(r'\S+@\S+', '', text)
+    text = re.sub(r'https?://\S+|www\.\S+', '', text)
+    return re.sub(r'[^\w\s]', ' ', text.replace('"', '')).split()
+
+
+FIXED_CASES = [
+    "",
+    "   \n\t ",
+    "Python",
+    # CamelCase
+    "HuggingFace TensorFlow PyTorch",
+    "iOS macOS JavaScript XMLHttpRequest ABCdef",
+    # .net
+    ".net",
+    "ASP.NET Core and .NET 6",
+    "vb.net, .net-core, .network, a.net.b",
+    "user@.net x@y.net",
+    # Emails and URLs
+    "Contact john.doe@example.com for details",
+    "see https://github.com/user/repo and www.example.org/page",
+    "http://a.b@c.d mailto:x@y.z, foo@bar",
+    "@handle trailing@ https:// www.",
+    # Quotes
+    '"Machine Learning" AND Python',
+    '"deep  learning" "computer vision" "unterminated',
+    '""  "a" "b c d"',
+    'He said "use .net" and "HuggingFace"',
+    # Long tokens (halves)
+    "internationalization microservices Kubernetes",
+    "abcdefgh abcdefghi abcdefghij",
+    "supercalifragilisticexpialidocious",
+    # Symbols, digits, unicode
+    "C++ C# Node.js (React/Redux) R&D 50% #1",
+    "résumé naïve Zürich 東京 café_au_lait",
+    "snake_case kebab-case dot.case 3.14 v2.0",
+    "repeat repeat Repeat REPEAT repeat",
+]
+
+
+@pytest.mark.parametrize("text", FIXED_CASES)
+def test_normalize_matches_reference_on_fixed_cases(text):
+    assert normalize(text) == reference_normalize(text)
+
+
+@pytest.mark.parametrize("text", FIXED_CASES)
+def test_phrase_words_matches_reference_on_fixed_cases(text):
+    assert phrase_words(text) == reference_phrase_words(text)
+
+
+FRAGMENTS = [
+    "python", "Java", "HuggingFace", "TensorFlow", "iOS", ".net", "ASP.NET", ".NET", "vb.net",
+    "a@b.com", "john.doe@example.com", "@", "foo@", "https://x.io/a?b=c", "http://", "www.site.org",
+    '"', '"machine learning"', "'", "C++", "C#", "node.js", "R&D", "-", "/", "(", ")", ",", ".",
+    "internationalization", "abcdefghi", "microservices", "résumé", "東京", "_", "42", "3.14",
+    " ", "  ", "\n", "\t",
+]
+
+
+def _random_text(rng: random.Random) -> str:
+    parts = []
+    for _ in range(rng.randint(0, 25)):
+        if rng.random() < 0.15:
+            parts.append("".join(rng.choice('aZ.@"/:-_ 9é') for _ in range(rng.randint(1, 12))))
+        else:
+            parts.append(rng.choice(FRAGMENTS))
+    separator = rng.choice(["", " ", " ", "\n"])
+    return separator.join(parts)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_normalize_matches_reference_on_random_inputs(seed):
+    rng = random.Random(seed)
+    for _ in range(500):
+        text = _random_text(rng)
+        assert normalize(text) == reference_normalize(text), text
+        assert phrase_words(text) == reference_phrase_words(text), text